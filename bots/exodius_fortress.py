@@ -6,6 +6,7 @@ from src.game_constants import SnipePriority, TowerType
 from src.robot_controller import RobotController
 from src.player import Player
 from src.map import Map
+from src.map_analysis import get_map_analysis
 import numpy as np
 
 NUM_TOWERS_PER_REINF = 5
@@ -32,27 +33,16 @@ def max_cluster(reinf_tiles):
     return tile
 
 def num_tiles_in_range(map: Map):
-    # Upper bounds on bounding square
-    GUNX = GUNY = int(np.sqrt(TowerType.GUNSHIP.range))
-    BOMBX = BOMBY = int(np.sqrt(TowerType.BOMBER.range))
+    analysis = get_map_analysis(map)
 
     gunship_tiles = np.zeros(shape=(map.width, map.height), dtype=int)
     bomber_tiles = np.zeros(shape=(map.width, map.height), dtype=int)
-    for tile in map.path:
-        x, y = tile
-        for tower_x in range(x - GUNX, x + GUNX + 1):
-            for tower_y in range(y - GUNY, y + GUNY + 1):
-                if not map.is_space(tower_x, tower_y):
-                    continue
-                if (x - tower_x)**2 + (y - tower_y)**2 <= TowerType.GUNSHIP.range:
-                    gunship_tiles[tower_x, tower_y] += 1
-        
-        for tower_x in range(x - BOMBX, x + BOMBX + 1):
-            for tower_y in range(y - BOMBY, y + BOMBY + 1):
-                if not map.is_space(tower_x, tower_y):
-                    continue
-                if (x - tower_x)**2 + (y - tower_y)**2 <= TowerType.BOMBER.range:
-                    bomber_tiles[tower_x, tower_y] += 1
+    for x in range(map.width):
+        for y in range(map.height):
+            if not map.is_space(x, y):
+                continue
+            gunship_tiles[x, y] = analysis.get_num_path_tiles_in_range(TowerType.GUNSHIP, x, y)
+            bomber_tiles[x, y] = analysis.get_num_path_tiles_in_range(TowerType.BOMBER, x, y)
     
     return (gunship_tiles, bomber_tiles)
 
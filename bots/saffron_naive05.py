@@ -30,6 +30,7 @@ from src.game_constants import SnipePriority, TowerType
 from src.robot_controller import RobotController
 from src.player import Player
 from src.map import Map
+from src.map_analysis import get_map_analysis
 from src.tower import Tower
 
 class BotPlayer(Player):
@@ -46,7 +47,7 @@ class BotPlayer(Player):
         self.towers_spawned = 0
 
         self.path_locs: set[tuple[int, int]] = self.get_path_locs(map)
-        self.ordered_bomberlocs: list[tuple[tuple[int, int], int]] = self.get_ordered_bomberlocs(map, self.path_locs)
+        self.ordered_bomberlocs: list[tuple[tuple[int, int], int]] = self.get_ordered_bomberlocs(map)
         self.next_shooter_loc: tuple[int, int] = self.ordered_bomberlocs.pop()[0]
         self.next_farm_loc: tuple[int, int] = self.ordered_bomberlocs.pop(0)[0]
         self.farm_towers_endgame: set[Tower] = None
@@ -68,53 +69,20 @@ class BotPlayer(Player):
                     ans.add((x, y))
         return ans
 
-    def get_ordered_bomberlocs(self, map: Map, path_locs: set[tuple[int, int]]) -> list[tuple[tuple[int, int], int]]:
+    def get_ordered_bomberlocs(self, map: Map) -> list[tuple[tuple[int, int], int]]:
         """returns a list of ((x, y), n) sorted by n ascending
         where (x, y) is a possible bomber location and n is its efficiency
         """
+        analysis = get_map_analysis(map)
         temp: list[tuple[tuple[int, int], int]] = []
         for x in range(map.width):
             for y in range(map.height):
                 if map.is_space(x, y):
-                    temp.append(((x, y), self.get_bomber_efficiency(x, y, path_locs)))
+                    temp.append(((x, y), analysis.get_num_path_tiles_in_range(TowerType.BOMBER, x, y)))
 
         return sorted(temp, key=lambda orderedloc: orderedloc[1])
 
 
-    def get_bomber_efficiency(self, x: int, y: int, path_locs: set[tuple[int, int]]):
-        """gets the paths that a bomber of location (x,y) can effect
-        when given path_locs, a set of all (x, y) tuples of paths that exist
-        """
-        tiles_in_range: set[tuple[int, int]] = set()
-
-        disallowed_bombervecs = {
-            (3, 3),
-            (3, 2),
-            (3, -2),
-            (3, -3),
-            (2, 3),
-            (2, -3),
-            (-2, 3),
-            (-2, -3),
-            (-3, 3),
-            (-3, 2),
-            (-3, -2),
-            (-3, -3),
-        }
-
-        for xoffset in range(-3, 4):
-            for yoffset in range(-3, 4):
-                if (xoffset, yoffset) in disallowed_bombervecs:
-                    continue
-
-                tiles_in_range.add((x + xoffset, y + yoffset))
-
-        # print(f"intersection: {sorted(list(path_locs and tiles_in_range))}")
-        # print(f"pathlocs {sorted(list(path_locs))}")
-        temp = len(path_locs.intersection(tiles_in_range))
-        # print(f"efficiency{temp}")
-        return temp
-
     def play_turn(self, rc: RobotController):
         self.build_towers(rc)
         self.towers_attack(rc)
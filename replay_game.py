@@ -1,115 +1,124 @@
 import sys
 import json
-import compress_json
+import zlib
+import pygame
 from src.game_state import GameState
-from src.map import Map
-from src.game_constants import Team, TowerType
-from src.tower import Tower
-from src.debris import Debris
+from src.map_cache import load_map
+from src.replay import TurnIndex
+from src.replay_state import load_replay, set_turn
 
-# python replay_game.py <mapname>.awap24r [--web]
+# python replay_game.py <mapname>.awap24r [--web] [--turn <turn number to start at>]
 WEB_MODE = False
+START_TURN = 1
 if len(sys.argv) > 1:
     REPLAY_FILE_PATH = sys.argv[1]
     if '--web' in sys.argv:
         WEB_MODE = True
+    if '--turn' in sys.argv:
+        START_TURN = int(sys.argv[sys.argv.index('--turn') + 1])
 else:
     print("Please provide the replay file path as a command line argument.")
     print("Example: python replay_game.py <mapname>.awap24r")
     exit()
 
-if REPLAY_FILE_PATH.endswith('.awap24r.gz'):
-    replay = compress_json.load(REPLAY_FILE_PATH)
-elif REPLAY_FILE_PATH.endswith('.awap24r'):
-    with open(REPLAY_FILE_PATH, 'r') as file:
-        replay = json.load(file)
-else:
+try:
+    replay = load_replay(REPLAY_FILE_PATH)
+except (OSError, EOFError, ValueError, json.JSONDecodeError, zlib.error) as e:
+    print(f"Could not read replay {REPLAY_FILE_PATH}: {e}")
     print("Please provide a valid replay file.")
+    exit()
 
 print("Winner", replay['metadata']['winner'])
 print("Blue bot", replay['metadata']['blue_bot'])
 print("Red bot", replay['metadata']['red_bot'])
 map_name = replay['metadata']['map_name']
 map_path = f"maps/{map_name}.awap24m"
-map = Map(map_path)
+map = load_map(map_path)
 gs = GameState(map)
     
-def get_tower(team, json_tower):
-    id = json_tower['id']
-    json_typ = json_tower['type']
-    if json_typ == 'solar_farm':
-        typ = TowerType.SOLAR_FARM
-    elif json_typ == 'gunship':
-        typ = TowerType.GUNSHIP
-    elif json_typ == 'bomber':
-        typ = TowerType.BOMBER
-    elif json_typ == 'reinforcer':
-        typ = TowerType.REINFORCER
-    x = json_tower['x']
-    y = json_tower['y']
-    max_cooldown = json_tower['max_cooldown']
-    cooldown = json_tower['cooldown']
+turns = TurnIndex(replay)
+if len(turns) == 0:
+    print("The replay has no turns.")
+    exit()
 
-    res = Tower(team, typ, x, y)
-    res.id = id
-    res.current_cooldown = cooldown
-    return res
+# Playback speeds in turns per second; None plays a turn every frame, as fast as the game can be drawn
+SPEEDS = [1, 2, 5, 10, 20, 50, 100, 200, 500, None]
+FPS = 60
 
-def get_debris(team, json_debris):
-    id = json_debris['id']
-    x = json_debris['x']
-    y = json_debris['y']
-    max_health = json_debris['max_health']
-    health = json_debris['health']
-    max_cooldown = json_debris['max_cooldown']
-    cooldown = json_debris['cooldown']
-    sent_by_opponent = json_debris['sent_by_opponent']
+print("Controls:")
+print("  space: pause / resume")
+print("  left / right: step back / forward one turn")
+print("  page up / page down: jump back / forward 100 turns")
+print("  home / end: jump to the first / last turn")
+print("  0-9: jump to 0% - 90% of the game")
+print("  up / down: play faster / slower")
 
-    res = Debris(team, x, y, max_cooldown, max_health, sent_by_opponent)
-    res.id = id
-    res.current_cooldown = cooldown
-    res.health = health
-    return res
+speed_index = len(SPEEDS) - 1
+position = min(max(START_TURN - 1, 0), len(turns) - 1) # index of the turn being shown, fractional while playing
+shown = None
+paused = False
 
-def set_turn(turn):
-    gs.turn = turn['turn_number']
-    gs.balance[Team.BLUE] = turn['blue_balance']
-    gs.balance[Team.RED] = turn['red_balance']
-    gs.health[Team.BLUE] = turn['blue_health']
-    gs.health[Team.RED] = turn['red_health']
-    gs.time_remaining[Team.BLUE] = turn['blue_time_remaining']
-    gs.time_remaining[Team.RED] = turn['red_time_remaining']
+try:
+    set_turn(gs, turns.get_turn(int(position)))
+except (OSError, EOFError, ValueError, json.JSONDecodeError, zlib.error) as e:
+    print(f"Could not decode turn {int(position) + 1} of replay {REPLAY_FILE_PATH}: {e}")
+    exit()
+shown = int(position)
 
-    gs.towers[Team.BLUE] = {}
-    for json_tower in turn['blue_towers']:
-        tower = get_tower(Team.BLUE, json_tower)
-        gs.towers[Team.BLUE][tower.id] = tower
-    gs.towers[Team.RED] = {}
-    for json_tower in turn['red_towers']:
-        tower = get_tower(Team.RED, json_tower)
-        gs.towers[Team.RED][tower.id] = tower
-    
-    gs.debris[Team.BLUE] = {}
-    for json_debris in turn['blue_debris']:
-        debris = get_debris(Team.BLUE, json_debris)
-        gs.debris[Team.BLUE][debris.id] = debris
-    gs.debris[Team.RED] = {}
-    for json_debris in turn['red_debris']:
-        debris = get_debris(Team.RED, json_debris)
-        gs.debris[Team.RED][debris.id] = debris
+try:
+    gs.render(process_events=False)
+except pygame.error:
+    print("PyGame may not be compatible with your system. Try running the replay with the --web flag.")
+    print(f"To render it to PNG files without a display instead, run: python -m src.frame_export {REPLAY_FILE_PATH}")
+    exit()
+
+clock = pygame.time.Clock()
+
+def seek(turn_index):
+    global position, paused
+    position = min(max(turn_index, 0), len(turns) - 1)
+    paused = True
+
+while True:
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            exit()
+        if event.type != pygame.KEYDOWN:
+            continue
+        if event.key == pygame.K_SPACE:
+            if paused and int(position) == len(turns) - 1: # restart from the beginning at the end
+                position = 0
+            paused = not paused
+        elif event.key == pygame.K_RIGHT:
+            seek(int(position) + 1)
+        elif event.key == pygame.K_LEFT:
+            seek(int(position) - 1)
+        elif event.key == pygame.K_PAGEDOWN:
+            seek(int(position) + 100)
+        elif event.key == pygame.K_PAGEUP:
+            seek(int(position) - 100)
+        elif event.key == pygame.K_HOME:
+            seek(0)
+        elif event.key == pygame.K_END:
+            seek(len(turns) - 1)
+        elif pygame.K_0 <= event.key <= pygame.K_9:
+            seek((event.key - pygame.K_0) * len(turns) // 10)
+        elif event.key == pygame.K_UP:
+            speed_index = min(speed_index + 1, len(SPEEDS) - 1)
+            print(f"Speed: {SPEEDS[speed_index] or 'max'} turns per second")
+        elif event.key == pygame.K_DOWN:
+            speed_index = max(speed_index - 1, 0)
+            print(f"Speed: {SPEEDS[speed_index] or 'max'} turns per second")
 
-    gs.current_snipes[Team.BLUE] = turn['blue_snipes']
-    gs.current_snipes[Team.RED] = turn['red_snipes']
-    gs.current_bombs[Team.BLUE] = turn['blue_bombs']
-    gs.current_bombs[Team.RED] = turn['red_bombs']
+    speed = SPEEDS[speed_index]
+    seconds = clock.tick(FPS if paused or speed is not None else 0) / 1000
+    if not paused:
+        position += 1 if speed is None else speed * seconds
+        if position >= len(turns) - 1:
+            position = len(turns) - 1
+            paused = True
 
-for turn in replay['turns']:
-    set_turn(turn)
-    if WEB_MODE:
-        pass
-        
-    try:
-        gs.render()
-    except:
-        print("PyGame may not be compatible with your system. Try running the replay with the --web flag.")
-        exit()
+    if int(position) != shown:
+        shown = int(position)
+        set_turn(gs, turns.get_turn(shown))
+    gs.render(process_events=False)
@@ -2,6 +2,9 @@ import json
 import compress_json
 from colorama import Fore, Back, Style, init
 import time
+from src.replay import get_full_turns
+from src.columnar_replay import load_columnar_replay
+from src.action_replay import load_action_replay
 
 init(autoreset=True)  
 
@@ -20,6 +23,10 @@ def load_replay(file_path):
     elif file_path.endswith('.awap24r'):
         with open(file_path, 'r') as file:
             replay_data = json.load(file)
+    elif file_path.endswith('.awap24rc'):
+        replay_data = load_columnar_replay(file_path)
+    elif file_path.endswith('.awap24a.gz'):
+        replay_data = load_action_replay(file_path)
     else:
         print("Please provide a valid replay file.")
     return replay_data
@@ -67,5 +74,5 @@ time.sleep(1)
 
 
 # Visualize each turn
-for turn in replay['turns']:
+for turn in get_full_turns(replay):
     visualize_turn(turn, metadata)
\ No newline at end of file
@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 
 from src.game import Game
+from src.tournament import run_tournament, print_standings
 import argparse
 import json
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
 def main():
     parser = argparse.ArgumentParser(description="Run the game")
     parser.add_argument("-b", "--blue_path", type=str, required=False)
@@ -11,8 +18,28 @@ def main():
     parser.add_argument("-m", "--map_path", type=str, required=False)
     parser.add_argument("-c", "--config_file", type=str, required=False)
     parser.add_argument("--render", action="store_true", help="Whether or not to display the game while it is running")
+    parser.add_argument("--render_fps", type=positive_int, required=False, help="With --render, draw the game in a separate process at this frame rate so the game runs at full speed")
+    parser.add_argument("--render_every", type=positive_int, default=1, help="With --render, only draw every this many turns")
+    parser.add_argument("--replay_keyframe_interval", type=positive_int, required=False, help="Store the replay as a full turn every this many turns, with only the changes in between")
+    parser.add_argument("--columnar_replay", action="store_true", help="Write the replay in the columnar binary .awap24rc format")
+    parser.add_argument("--action_log", action="store_true", help="Record only each bot's actions (.awap24a.gz) instead of a full replay")
+    parser.add_argument("--seed", type=int, required=False, help="Seed of the coin flip that breaks ties")
+    parser.add_argument("--summary_only", action="store_true", help="Don't record a replay; only write a summary of the result (.summary.json) at the end of each game")
+    parser.add_argument("--background_replay", action="store_true", help="Encode, compress and write the replay on a background thread")
+    parser.add_argument("--tournament", type=str, nargs="+", required=False, help="Bots to play against each other on every map in --maps")
+    parser.add_argument("--maps", type=str, nargs="+", required=False, help="Maps to play the tournament on")
+    parser.add_argument("--workers", type=int, required=False, help="Number of matches to run in parallel (defaults to the number of cores)")
     args = parser.parse_args()
 
+    if args.tournament:
+        if not args.maps:
+            raise Exception("Must provide --maps when using --tournament")
+        if len(args.tournament) < 2:
+            raise Exception("Must provide at least two bots to --tournament")
+        results = run_tournament(args.tournament, args.maps, args.workers, args.summary_only, args.background_replay)
+        print_standings(results)
+        return
+
     if args.config_file:
         configs = json.load(open(args.config_file))
         blue_path = configs["bots"][0]
@@ -29,7 +56,15 @@ def main():
         blue_path=blue_path,
         red_path=red_path,
         map_path=map_path,
-        render=args.render
+        render=args.render,
+        render_fps=args.render_fps,
+        render_every=args.render_every,
+        replay_keyframe_interval=args.replay_keyframe_interval,
+        columnar_replay=args.columnar_replay,
+        action_log=args.action_log,
+        seed=args.seed,
+        summary_only=args.summary_only,
+        background_replay=args.background_replay
     )
     winner = game.run_game()
     print(f"Winner: {winner}")
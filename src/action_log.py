@@ -0,0 +1,102 @@
+# Action logs (.awap24a.gz) record only what each bot did on each turn, instead of the full state of every turn.
+# The engine is deterministic given the actions and the tie-break seed, so the state of every turn can be
+# regenerated by re-running the game with the logged actions in place of the bots (see src/action_replay.py).
+#
+# Each action is logged after it has been applied, already resolved to one of the primitive actions
+# (auto_snipe becomes the SNIPE it fired, auto_bomb the BOMB, ...):
+#   [turn, team, "BUILD_TOWER", tower type name, x, y]
+#   [turn, team, "SELL_TOWER", tower_id]
+#   [turn, team, "SNIPE", tower_id, debris_id]
+#   [turn, team, "BOMB", tower_id]
+#   [turn, team, "SEND_DEBRIS", cooldown, health]
+# where team is the Team value. Turns on which a bot failed (timed out or crashed) are logged as [turn, team].
+# The seconds each bot's play_turn took on each turn it didn't fail are logged in order under "times"
+# (one list per team, by Team value), so the time remaining of every turn can be regenerated too.
+
+import os
+import compress_json
+from src.game_constants import Team
+from src.game_state import GameState
+from src.map import Map
+from src.replay import ReplayMetadata
+
+def get_result(gs: GameState, winner: Team) -> dict:
+    '''
+    Returns the final state of a game that the verifier compares after re-simulating it
+    '''
+    return {
+        "winner": winner.name if winner is not None else None,
+        "turn": gs.turn,
+        "blue_health": gs.health[Team.BLUE],
+        "red_health": gs.health[Team.RED],
+        "blue_balance": gs.balance[Team.BLUE],
+        "red_balance": gs.balance[Team.RED],
+    }
+
+class ActionLog:
+    def __init__(
+            self,
+            game_name: str,
+            map: Map,
+            map_file: str,
+            blue_bot: str,
+            red_bot: str,
+            seed: int,
+            blue_failed_init: bool,
+            red_failed_init: bool
+    ):
+        self.metadata = ReplayMetadata(
+            game_name=game_name,
+            map_name=map.name,
+            map_width=map.width,
+            map_height=map.height,
+            map_path=map.path,
+            blue_bot=blue_bot,
+            red_bot=red_bot,
+            winner="none",
+            scores=[0.0, 0.0]
+        ).__dict__
+        self.metadata["map_file"] = map_file
+        self.metadata["seed"] = seed
+        self.metadata["blue_failed_init"] = blue_failed_init
+        self.metadata["red_failed_init"] = red_failed_init
+        self.metadata["result"] = None
+        self.actions = []
+        self.failures = []
+        self.times = [[] for team in Team]
+        self.closed = False
+
+    def get_path(self) -> str:
+        return f"replays/{self.metadata['game_name']}.awap24a.gz"
+
+    def add_action(self, turn: int, team: Team, action: list):
+        # a bot that timed out may still be running after the game has ended
+        if not self.closed:
+            self.actions.append([turn, team.value] + action)
+
+    def add_failure(self, turn: int, team: Team):
+        self.failures.append([turn, team.value])
+
+    def add_time(self, team: Team, time_used: float):
+        self.times[team.value].append(time_used)
+
+    def set_result(self, winner: Team, gs: GameState):
+        self.closed = True
+        if winner == Team.BLUE:
+            self.metadata["winner"] = "blue"
+            self.metadata["scores"] = [1.0, 0.0]
+        else:
+            self.metadata["winner"] = "red"
+            self.metadata["scores"] = [0.0, 1.0]
+        self.metadata["result"] = get_result(gs, winner)
+
+    def write_json(self):
+        path = self.get_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        res = {
+            "metadata": self.metadata,
+            "actions": self.actions,
+            "failures": self.failures,
+            "times": self.times
+        }
+        compress_json.dump(res, path)
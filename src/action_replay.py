@@ -0,0 +1,111 @@
+# Re-simulates games from their action logs (see src/action_log.py).
+# python -m src.action_replay replays/<game>.awap24a.gz  re-simulates each log and checks its final health and balances
+
+import sys
+import compress_json
+from src.action_log import get_result
+from src.game import Game
+from src.game_constants import ActionType, Team, TowerType
+from src.game_exception import GameException
+from src.replay import Replay
+from src.robot_controller import RobotController
+
+def load_action_log(path: str) -> dict:
+    return compress_json.load(path)
+
+def apply_action(controller: RobotController, action: list):
+    '''
+    Applies a logged action through the same checks a bot's call would go through
+    '''
+    action_type = ActionType[action[0]]
+    args = action[1:]
+    if action_type == ActionType.BUILD_TOWER:
+        tower_type, x, y = args
+        controller.build_tower(TowerType[tower_type], x, y)
+    elif action_type == ActionType.SELL_TOWER:
+        controller.sell_tower(*args)
+    elif action_type == ActionType.SNIPE:
+        controller.snipe(*args)
+    elif action_type == ActionType.BOMB:
+        controller.bomb(*args)
+    elif action_type == ActionType.SEND_DEBRIS:
+        controller.send_debris(*args)
+    else:
+        raise GameException(f"Unexpected action in action log: {action}")
+
+class ActionLogGame(Game):
+    '''
+    A game that plays each team's logged actions in place of its bot
+    '''
+    def __init__(self, log: dict, map_path: str = None):
+        metadata = log["metadata"]
+        self.setup(map_path if map_path is not None else metadata["map_file"], metadata["seed"])
+        self.blue_failed_init = metadata["blue_failed_init"]
+        self.red_failed_init = metadata["red_failed_init"]
+        self.game_name = metadata["game_name"]
+        self.blue_bot_name = metadata["blue_bot"]
+        self.red_bot_name = metadata["red_bot"]
+        self.init_controllers()
+
+        self.actions = {} # (turn, team value) -> actions of that team on that turn, in order
+        for turn, team, *action in log["actions"]:
+            self.actions.setdefault((turn, team), []).append(action)
+        self.failures = {(turn, team) for turn, team in log["failures"]}
+        # seconds each team took on each of its turns, in order; logs from before these were recorded
+        # leave the time remaining as if every turn took no time
+        self.times = {team: iter(times) for team, times in zip(Team, log.get("times", [[], []]))}
+
+    def call_player_code(self, team: Team):
+        controller = self.blue_controller if team == Team.BLUE else self.red_controller
+        for action in self.actions.get((self.gs.turn, team.value), []):
+            apply_action(controller, action)
+        if (self.gs.turn, team.value) in self.failures:
+            self.gs.time_remaining[team] = 0
+            return False
+        self.gs.time_remaining[team] -= next(self.times[team], 0)
+        return True
+
+def get_turns(log: dict, map_path: str = None):
+    '''
+    Yields every turn of a logged game in the format of Replay.get_turn, regenerated by re-simulating it
+    '''
+    game = ActionLogGame(log, map_path)
+    if game.blue_failed_init or game.red_failed_init:
+        return
+    metadata = log["metadata"]
+    replay = Replay(game.game_name, game.map, metadata["blue_bot"], metadata["red_bot"])
+    while True:
+        winner = game.run_turn()
+        yield replay.get_turn(game.gs)
+        if winner is not None:
+            return
+
+def load_action_replay(path: str, map_path: str = None) -> dict:
+    '''
+    Returns an action log in the same shape as a loaded JSON replay: turns are re-simulated as they are iterated
+    '''
+    log = load_action_log(path)
+    return {"metadata": log["metadata"], "turns": get_turns(log, map_path)}
+
+def verify_action_log(log: dict, map_path: str = None) -> list:
+    '''
+    Re-simulates a logged game and returns the differences between its final state and the logged one
+    as (key, logged value, re-simulated value) tuples. An empty list means the log replays exactly.
+    '''
+    game = ActionLogGame(log, map_path)
+    winner = game.run_game()
+    expected = log["metadata"]["result"]
+    actual = get_result(game.gs, winner)
+    return [(key, expected[key], actual[key]) for key in expected if expected[key] != actual[key]]
+
+if __name__ == "__main__":
+    failed = False
+    for path in sys.argv[1:]:
+        differences = verify_action_log(load_action_log(path))
+        if len(differences) == 0:
+            print(f"{path}: OK")
+        else:
+            failed = True
+            for key, expected, actual in differences:
+                print(f"{path}: {key} is {actual} when re-simulated, but {expected} in the log")
+    sys.exit(1 if failed else 0)
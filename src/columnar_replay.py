@@ -0,0 +1,260 @@
+# Columnar binary replays (.awap24rc), for analytics over many replays.
+# Per-turn scalars are stored as packed arrays, one per field, so a single field of every turn can be read
+# without decoding anything else. Each turn's towers, debris, snipes and bombs are stored as a zlib-compressed
+# block of columns, and an index of block offsets lets any turn be decoded on its own.
+#
+# Layout (little endian):
+#   MAGIC, VERSION
+#   one entity block per turn
+#   metadata as JSON
+#   scalars: for each of SCALAR_COLUMNS, one value per turn
+#
+# Numbers the game keeps as either ints or floats (balances after a sale, reinforced cooldowns, late-game
+# debris health, ...) are stored as doubles, and each turn and entity has an int_fields column with a bit
+# per double column that is set when the value was an int, so decoding gives back the same types.
+#   index: num_turns + 1 uint64 offsets of the entity blocks (the last one is where the metadata starts)
+#   footer: metadata offset, scalars offset, index offset, num_turns, MAGIC
+
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+MAGIC = b"AWAP24RC"
+VERSION = 2
+PREAMBLE = struct.Struct("<8sI")
+FOOTER = struct.Struct("<QQQI8s")
+
+SCALAR_COLUMNS = [
+    ("turn_number", 'i'),
+    ("blue_balance", 'd'),
+    ("red_balance", 'd'),
+    ("blue_health", 'd'),
+    ("red_health", 'd'),
+    ("blue_time_remaining", 'd'),
+    ("red_time_remaining", 'd'),
+    ("int_fields", 'B'),
+]
+TOWER_COLUMNS = [
+    ("id", 'q'),
+    ("type", 'B'),
+    ("x", 'i'),
+    ("y", 'i'),
+    ("max_cooldown", 'i'),
+    ("cooldown", 'd'),
+    ("int_fields", 'B'),
+]
+DEBRIS_COLUMNS = [
+    ("id", 'q'),
+    ("x", 'i'),
+    ("y", 'i'),
+    ("max_health", 'd'),
+    ("health", 'd'),
+    ("max_cooldown", 'i'),
+    ("cooldown", 'i'),
+    ("sent_by_opponent", 'B'),
+    ("int_fields", 'B'),
+]
+TOWER_TYPES = ["solar_farm", "gunship", "bomber", "reinforcer"]
+
+def get_double_columns(columns: list) -> list:
+    return [name for (name, typecode) in columns if typecode == 'd']
+
+def get_int_fields(row: dict, columns: list) -> int:
+    '''
+    Returns the int_fields bits of row: bit k is set if the k-th double column of columns holds an int
+    '''
+    return sum(1 << k for k, name in enumerate(get_double_columns(columns)) if isinstance(row[name], int))
+
+def restore_ints(row: dict, columns: list):
+    '''
+    Turns the double columns of a decoded row that held ints back into ints, and drops int_fields
+    '''
+    int_fields = row.pop("int_fields")
+    for k, name in enumerate(get_double_columns(columns)):
+        if int_fields >> k & 1:
+            row[name] = int(row[name])
+
+def to_little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+class ColumnarReplayWriter:
+    '''
+    Writes turns (in the dict format of Replay.get_turn) to a columnar replay as they are added.
+    Only the per-turn scalars and block offsets are kept in memory until close.
+    '''
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "wb")
+        self.file.write(PREAMBLE.pack(MAGIC, VERSION))
+        self.scalars = [array(typecode) for (_, typecode) in SCALAR_COLUMNS]
+        self.offsets = array('Q')
+
+    def add_turn(self, turn: dict):
+        for (name, _), values in zip(SCALAR_COLUMNS, self.scalars):
+            values.append(get_int_fields(turn, SCALAR_COLUMNS) if name == "int_fields" else turn[name])
+
+        chunks = []
+        for team in ["blue", "red"]:
+            towers = turn[f"{team}_towers"]
+            chunks.append(struct.pack("<I", len(towers)))
+            for (name, typecode) in TOWER_COLUMNS:
+                if name == "type":
+                    column = array(typecode, [TOWER_TYPES.index(tower["type"]) for tower in towers])
+                elif name == "int_fields":
+                    column = array(typecode, [get_int_fields(tower, TOWER_COLUMNS) for tower in towers])
+                else:
+                    column = array(typecode, [tower[name] for tower in towers])
+                chunks.append(to_little_endian(column))
+        for team in ["blue", "red"]:
+            debris = turn[f"{team}_debris"]
+            chunks.append(struct.pack("<I", len(debris)))
+            for (name, typecode) in DEBRIS_COLUMNS:
+                if name == "int_fields":
+                    column = array(typecode, [get_int_fields(deb, DEBRIS_COLUMNS) for deb in debris])
+                else:
+                    column = array(typecode, [deb[name] for deb in debris])
+                chunks.append(to_little_endian(column))
+        for team in ["blue", "red"]:
+            snipes = turn[f"{team}_snipes"]
+            chunks.append(struct.pack("<I", len(snipes)))
+            chunks.append(to_little_endian(array('i', [coord for snipe in snipes for loc in snipe for coord in loc])))
+            bombs = turn[f"{team}_bombs"]
+            chunks.append(struct.pack("<I", len(bombs)))
+            chunks.append(to_little_endian(array('i', [coord for bomb in bombs for coord in bomb])))
+
+        self.offsets.append(self.file.tell())
+        self.file.write(zlib.compress(b"".join(chunks)))
+
+    def close(self, metadata: dict):
+        metadata_offset = self.file.tell()
+        self.offsets.append(metadata_offset)
+        self.file.write(json.dumps(metadata).encode("utf-8"))
+
+        scalars_offset = self.file.tell()
+        for values in self.scalars:
+            self.file.write(to_little_endian(values))
+
+        index_offset = self.file.tell()
+        self.file.write(to_little_endian(self.offsets))
+        self.file.write(FOOTER.pack(metadata_offset, scalars_offset, index_offset, len(self.offsets) - 1, MAGIC))
+        self.file.close()
+
+class ColumnarReplay:
+    '''
+    Reads a columnar replay. Opening it only reads the footer, metadata and turn index;
+    scalars and turns are read from disk when they are asked for.
+    '''
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} columnar replay")
+            f.seek(-FOOTER.size, os.SEEK_END)
+            metadata_offset, self.scalars_offset, index_offset, self.num_turns, magic = FOOTER.unpack(f.read(FOOTER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is truncated")
+
+            f.seek(metadata_offset)
+            self.metadata = json.loads(f.read(self.scalars_offset - metadata_offset).decode("utf-8"))
+            f.seek(index_offset)
+            self.offsets = from_little_endian('Q', f.read(8 * (self.num_turns + 1)))
+
+    def __len__(self) -> int:
+        return self.num_turns
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            for i in range(self.num_turns):
+                yield self.decode_turn(i, f)
+
+    def get_scalar(self, name: str) -> array:
+        '''
+        Returns the value of a per-turn scalar (e.g. "blue_health") for every turn
+        '''
+        offset = self.scalars_offset
+        for (column, typecode) in SCALAR_COLUMNS:
+            itemsize = array(typecode).itemsize
+            if column == name:
+                with open(self.path, "rb") as f:
+                    f.seek(offset)
+                    return from_little_endian(typecode, f.read(itemsize * self.num_turns))
+            offset += itemsize * self.num_turns
+        raise KeyError(f"Unknown replay scalar: {name}")
+
+    def get_turn(self, i: int) -> dict:
+        with open(self.path, "rb") as f:
+            return self.decode_turn(i, f)
+
+    def decode_turn(self, i: int, f) -> dict:
+        turn = {}
+        offset = self.scalars_offset
+        for (name, typecode) in SCALAR_COLUMNS:
+            itemsize = array(typecode).itemsize
+            f.seek(offset + i * itemsize)
+            turn[name] = from_little_endian(typecode, f.read(itemsize))[0]
+            offset += itemsize * self.num_turns
+        restore_ints(turn, SCALAR_COLUMNS)
+
+        f.seek(self.offsets[i])
+        block = zlib.decompress(f.read(self.offsets[i+1] - self.offsets[i]))
+        pos = 0
+
+        def read_columns(columns):
+            nonlocal pos
+            (count,) = struct.unpack_from("<I", block, pos)
+            pos += 4
+            values = {}
+            for (name, typecode) in columns:
+                size = array(typecode).itemsize * count
+                values[name] = from_little_endian(typecode, block[pos:pos + size])
+                pos += size
+            return [{name: values[name][j] for (name, _) in columns} for j in range(count)]
+
+        def read_coords(coords_per_item):
+            nonlocal pos
+            (count,) = struct.unpack_from("<I", block, pos)
+            pos += 4
+            size = 4 * coords_per_item * count
+            values = from_little_endian('i', block[pos:pos + size])
+            pos += size
+            return [values[j:j + coords_per_item].tolist() for j in range(0, len(values), coords_per_item)]
+
+        for team in ["blue", "red"]:
+            towers = read_columns(TOWER_COLUMNS)
+            for tower in towers:
+                tower["type"] = TOWER_TYPES[tower["type"]]
+                restore_ints(tower, TOWER_COLUMNS)
+            turn[f"{team}_towers"] = towers
+        for team in ["blue", "red"]:
+            debris = read_columns(DEBRIS_COLUMNS)
+            for deb in debris:
+                deb["sent_by_opponent"] = bool(deb["sent_by_opponent"])
+                restore_ints(deb, DEBRIS_COLUMNS)
+            turn[f"{team}_debris"] = debris
+        for team in ["blue", "red"]:
+            turn[f"{team}_snipes"] = [[snipe[0:2], snipe[2:4]] for snipe in read_coords(4)]
+            turn[f"{team}_bombs"] = read_coords(2)
+        return turn
+
+def load_columnar_replay(path: str) -> dict:
+    '''
+    Returns a columnar replay in the same shape as a loaded JSON replay: turns are decoded lazily as they are iterated
+    '''
+    replay = ColumnarReplay(path)
+    return {"metadata": replay.metadata, "turns": replay}
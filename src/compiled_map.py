@@ -0,0 +1,142 @@
+# Compiled .awap24mc sidecars for .awap24m maps.
+# A compiled map holds the tile grid, the ordered path and the per-tower-type coverage tables
+# as raw arrays, so loading it is an mmap and a few memoryview casts rather than a parse.
+#
+# Layout (native byte order, every section 4-byte aligned):
+#   header: magic, version, width, height, path length, number of tower types
+#   ranges: range of each TowerType, in definition order (used to detect stale tables)
+#   tiles:  width * height bytes of Tile values, indexed x * height + y, padded to 4 bytes
+#   path:   path length (x, y) pairs of uint32
+#   for each TowerType: width * height + 1 uint32 offsets, then the uint32 path indices they point into
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from types import MappingProxyType
+from src.game_constants import Tile, TowerType
+
+COMPILED_MAP_SUFFIX = "c"
+MAGIC = b"AWAP24MC"
+VERSION = 1
+HEADER = struct.Struct("=8sIIIII")
+
+TILE_VALUES = {tile.value for tile in Tile}
+
+def get_compiled_path(fname: str) -> str:
+    return fname + COMPILED_MAP_SUFFIX
+
+class CompiledMap:
+    def __init__(self, width: int, height: int, tiles, path, coverage: dict):
+        self.width = width
+        self.height = height
+        self.tiles = tiles # Tile values, indexed x * height + y
+        self.path = path # flat x0, y0, x1, y1, ...
+        self.coverage = MappingProxyType(dict(coverage)) # tower type -> (offsets, indices)
+        self.frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, 'frozen', False):
+            raise AttributeError("CompiledMap is immutable")
+        super().__setattr__(name, value)
+
+def write_compiled_map(fname: str, compiled: CompiledMap):
+    '''
+    Writes compiled next to the source map fname. The file is written to a temporary name first,
+    so a reader never sees a partially written map.
+    '''
+    tower_types = list(TowerType)
+    chunks = [
+        HEADER.pack(MAGIC, VERSION, compiled.width, compiled.height, len(compiled.path) // 2, len(tower_types)),
+        array('I', [tower_type.range for tower_type in tower_types]).tobytes(),
+    ]
+    tiles = bytes(compiled.tiles)
+    chunks.append(tiles + b"\0" * (-len(tiles) % 4))
+    chunks.append(array('I', compiled.path).tobytes())
+    for tower_type in tower_types:
+        offsets, indices = compiled.coverage[tower_type]
+        chunks.append(array('I', offsets).tobytes())
+        chunks.append(array('I', indices).tobytes())
+
+    compiled_path = get_compiled_path(fname)
+    tmp_path = f"{compiled_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, compiled_path)
+
+def load_compiled_map(fname: str):
+    '''
+    Returns the CompiledMap of the source map fname, or None if there is no compiled map
+    or it is older than the source, was compiled with different tower ranges, or is truncated or malformed.
+    '''
+    compiled_path = get_compiled_path(fname)
+    try:
+        if os.path.getmtime(compiled_path) < os.path.getmtime(fname):
+            return None
+        with open(compiled_path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        return parse_compiled_map(memoryview(buffer))
+    except (ValueError, TypeError, IndexError, struct.error):
+        return None
+
+def parse_compiled_map(data: memoryview):
+    '''
+    Returns the CompiledMap in data, or None if it isn't a complete compiled map of the current version
+    '''
+    def get_section(pos: int, size: int) -> memoryview:
+        if pos + size > len(data):
+            raise ValueError("Compiled map is truncated")
+        return data[pos:pos + size]
+
+    magic, version, width, height, path_length, num_tower_types = HEADER.unpack_from(get_section(0, HEADER.size))
+    tower_types = list(TowerType)
+    if magic != MAGIC or version != VERSION or num_tower_types != len(tower_types):
+        return None
+
+    pos = HEADER.size
+    ranges = get_section(pos, 4 * num_tower_types).cast('I')
+    if list(ranges) != [tower_type.range for tower_type in tower_types]:
+        return None
+    pos += 4 * num_tower_types
+
+    tiles = get_section(pos, width * height)
+    pos += width * height + (-(width * height) % 4)
+    path = get_section(pos, 8 * path_length).cast('I')
+    pos += 8 * path_length
+    if path_length > 0 and (max(path[0::2]) >= width or max(path[1::2]) >= height):
+        return None
+
+    coverage = {}
+    for tower_type in tower_types:
+        offsets = get_section(pos, 4 * (width * height + 1)).cast('I')
+        pos += 4 * (width * height + 1)
+        indices = get_section(pos, 4 * offsets[-1]).cast('I')
+        pos += 4 * offsets[-1]
+        coverage[tower_type] = (offsets, indices)
+
+    if not set(bytes(tiles)) <= TILE_VALUES:
+        return None
+    return CompiledMap(width, height, tiles, path, coverage)
+
+def compile_map(fname: str):
+    from src.map import Map
+    from src.map_analysis import MapAnalysis
+
+    map = Map(fname, use_compiled=False)
+    analysis = MapAnalysis(map)
+    tiles = [map.tiles[x][y].value for x in range(map.width) for y in range(map.height)]
+    path = [coord for loc in map.path for coord in loc]
+    coverage = {tower_type: (analysis.offsets[tower_type], analysis.indices[tower_type]) for tower_type in TowerType}
+    write_compiled_map(fname, CompiledMap(map.width, map.height, tiles, path, coverage))
+
+if __name__ == "__main__":
+    # python -m src.compiled_map maps/*.awap24m
+    for fname in sys.argv[1:]:
+        compile_map(fname)
+        print(f"Compiled {fname} -> {get_compiled_path(fname)}")
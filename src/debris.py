@@ -1,9 +1,23 @@
 from __future__ import annotations
+from typing import NamedTuple
 from src.game_constants import Team
 
-class Debris:
-    id_counter = 0
+class DebrisView(NamedTuple):
+    '''
+    Read-only snapshot of a Debris, handed to players instead of a copy
+    '''
+    id: int
+    team: Team
+    progress: int
+    x: int
+    y: int
+    total_cooldown: int
+    current_cooldown: int
+    total_health: int
+    health: int
+    sent_by_opponent: bool
 
+class Debris:
     def __init__(
             self,
             team: Team,
@@ -11,9 +25,10 @@ class Debris:
             y: int,
             cooldown: int,
             health: int,
-            sent_by_opponent: bool
+            sent_by_opponent: bool,
+            id: int
     ) -> None:
-        self.id = self.increment()
+        self.id = id
         self.team = team
         self.progress = 0
         self.x = x
@@ -23,9 +38,17 @@ class Debris:
         self.total_health = health
         self.health = health
         self.sent_by_opponent = sent_by_opponent
-    
-    @staticmethod
-    def increment() -> int:
-        res = Debris.id_counter
-        Debris.id_counter += 1
-        return res
+
+    def get_view(self) -> DebrisView:
+        return DebrisView(
+            self.id,
+            self.team,
+            self.progress,
+            self.x,
+            self.y,
+            self.total_cooldown,
+            self.current_cooldown,
+            self.total_health,
+            self.health,
+            self.sent_by_opponent
+        )
@@ -0,0 +1,123 @@
+# Renders turns of replays to PNG files without a display, splitting the work over a pool of worker processes.
+# python -m src.frame_export replays/*.awap24r.gz --out frames --every 10
+
+import argparse
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # offscreen surfaces only, no window
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.replay import get_full_turns
+from src.replay_state import load_replay, set_turn
+
+def get_frame_path(out_dir: str, game_name: str, turn_number: int) -> str:
+    return os.path.join(out_dir, game_name, f"turn_{turn_number:05d}.png")
+
+def get_export_turns(replay_path: str, every: int = 1, turns: list = None) -> tuple:
+    '''
+    Returns the metadata of a replay and its full turns with the given turn numbers, or every every-th turn
+    starting with the first. The replay is decoded (action logs re-simulated) once, and only up to the last turn needed.
+    '''
+    replay = load_replay(replay_path)
+    last = max(turns, default=0) if turns is not None else None
+    selected = []
+    for i, turn in enumerate(get_full_turns(replay)):
+        if turns is None:
+            if i % every == 0:
+                selected.append(turn)
+            continue
+        if turn['turn_number'] in turns:
+            selected.append(turn)
+        if turn['turn_number'] >= last:
+            break
+    return replay['metadata'], selected
+
+def render_turns(metadata: dict, turns: list, out_dir: str, scale: float = 1.0, map_dir: str = "maps") -> list:
+    '''
+    Renders full turns of a replay to out_dir/<game name>/turn_<turn number>.png. Returns the turn numbers written.
+    '''
+    import pygame
+    from src.game_state import GameState
+    from src.map_cache import load_map
+    from src.renderer import Renderer
+
+    if len(turns) == 0:
+        return []
+    map = load_map(os.path.join(map_dir, f"{metadata['map_name']}.awap24m"))
+    gs = GameState(map)
+    renderer = Renderer(map)
+    surface = pygame.Surface(renderer.get_size())
+    os.makedirs(os.path.join(out_dir, metadata['game_name']), exist_ok=True)
+
+    written = []
+    for turn in turns:
+        set_turn(gs, turn)
+        renderer.draw(surface, gs)
+        frame = surface
+        if scale != 1.0:
+            size = (max(1, round(surface.get_width() * scale)), max(1, round(surface.get_height() * scale)))
+            frame = pygame.transform.smoothscale(surface, size)
+        pygame.image.save(frame, get_frame_path(out_dir, metadata['game_name'], turn['turn_number']))
+        written.append(turn['turn_number'])
+    return written
+
+def export_frames(replay_path: str, out_dir: str, every: int = 1, turns: list = None, scale: float = 1.0, map_dir: str = "maps") -> list:
+    '''
+    Renders the selected turns of a replay (see get_export_turns). Returns the turn numbers written.
+    '''
+    metadata, selected = get_export_turns(replay_path, every, turns)
+    return render_turns(metadata, selected, out_dir, scale, map_dir)
+
+def run_export(replay_paths: list, out_dir: str, every: int = 1, turns: list = None, workers: int = None, scale: float = 1.0) -> int:
+    '''
+    Renders the replays' frames in parallel, printing each job as it finishes. Returns the number of frames written.
+    With fewer replays than workers, each replay is decoded once and its turns are split into contiguous ranges
+    that are rendered in parallel.
+    '''
+    if workers is None:
+        workers = os.cpu_count()
+    num_chunks = max(1, workers // len(replay_paths))
+
+    num_frames = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if num_chunks == 1:
+            futures = {executor.submit(export_frames, replay_path, out_dir, every, turns, scale): replay_path for replay_path in replay_paths}
+        else:
+            # ranges of a replay are submitted as soon as it is decoded, while the other replays are still decoding
+            futures = {}
+            decoding = {executor.submit(get_export_turns, replay_path, every, turns): replay_path for replay_path in replay_paths}
+            for future in as_completed(decoding):
+                replay_path = decoding[future]
+                try:
+                    metadata, selected = future.result()
+                except Exception as e:
+                    print(f"{replay_path}: failed ({e})", flush=True)
+                    continue
+                chunk_size = max(1, -(-len(selected) // num_chunks))
+                for start in range(0, len(selected), chunk_size):
+                    chunk = selected[start:start + chunk_size]
+                    futures[executor.submit(render_turns, metadata, chunk, out_dir, scale)] = replay_path
+
+        for i, future in enumerate(as_completed(futures)):
+            replay_path = futures[future]
+            try:
+                written = future.result()
+            except Exception as e:
+                print(f"[{i+1}/{len(futures)}] {replay_path}: failed ({e})", flush=True)
+                continue
+            num_frames += len(written)
+            if len(written) > 0:
+                print(f"[{i+1}/{len(futures)}] {replay_path}: turns {written[0]}-{written[-1]}", flush=True)
+    return num_frames
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render replay turns to PNG files without a display")
+    parser.add_argument("replays", type=str, nargs="+", help="Replay files (.awap24r.gz, .awap24r, .awap24rc or .awap24a.gz)")
+    parser.add_argument("--out", type=str, default="frames", help="Directory to write frames to, one subdirectory per game")
+    parser.add_argument("--every", type=int, default=1, help="Render every this many turns")
+    parser.add_argument("--turns", type=int, nargs="+", required=False, help="Render only these turn numbers")
+    parser.add_argument("--workers", type=int, required=False, help="Number of processes to render with (defaults to the number of cores)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale frames by this factor, e.g. 0.25 for thumbnails")
+    args = parser.parse_args()
+
+    num_frames = run_export(args.replays, args.out, args.every, args.turns, args.workers, args.scale)
+    print(f"Wrote {num_frames} frames to {args.out}")
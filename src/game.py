@@ -1,7 +1,6 @@
 # Execute the actual game, starts the game and keep tracks of everything
 # Import all other classes
 
-import copy
 import importlib.util
 import random
 import sys
@@ -10,9 +9,12 @@ from src.game_state import GameState
 from src.robot_controller import RobotController
 from src.game_constants import Team, GameConstants, TowerType, get_debris_schedule
 from src.player import Player
-from src.map import Map
+from src.map_cache import load_map
 from src.replay import Replay
-from threading import Thread
+from src.action_log import ActionLog
+from src.game_summary import get_summary, write_summary
+from src.player_worker import PlayerWorker
+from src.live_renderer import LiveRenderer
 import time
 
 def import_file(module_name, file_path):
@@ -23,21 +25,15 @@ def import_file(module_name, file_path):
     return module
 
 class Game:
-    def __init__(self, blue_path: str, red_path: str, map_path: str, output_replay=False, render=False):
+    def __init__(self, blue_path: str, red_path: str, map_path: str, output_replay=False, render=False, replay_keyframe_interval=None, columnar_replay=False, action_log=False, seed=None, summary_only=False, background_replay=False, render_fps=None, render_every=1):
         self.output_replay = output_replay
-        self.render = render
-
-        # initialize map
-        self.map = Map(map_path)
-
-        # initialize game_state
-        self.gs = GameState(self.map)
+        self.setup(map_path, seed, render, render_fps, render_every)
 
         # initialize players
         self.blue_failed_init = False
         try:
             blue_bot_name = os.path.basename(blue_path).split(".")[0]
-            self.blue_player: Player = import_file(blue_bot_name, blue_path).BotPlayer(copy.deepcopy(self.map))
+            self.blue_player: Player = import_file(blue_bot_name, blue_path).BotPlayer(self.map)
         except:
             blue_bot_name = "blue"
             self.blue_failed_init = True
@@ -45,24 +41,87 @@ class Game:
         self.red_failed_init = False
         try:
             red_bot_name = os.path.basename(red_path).split(".")[0]
-            self.red_player: Player = import_file(red_bot_name, red_path).BotPlayer(copy.deepcopy(self.map))
+            self.red_player: Player = import_file(red_bot_name, red_path).BotPlayer(self.map)
         except:
             red_bot_name = "red"
             self.red_failed_init = True
 
-        # initialize replay
+        # initialize replay; an action log replaces the per-turn replay, and summary_only skips
+        # recording the game altogether and only writes its result once it is over
         self.game_name = f"{blue_bot_name}-{red_bot_name}-{self.map.name}"
-        self.replay = Replay(
-            self.game_name,
-            self.map,
-            blue_bot_name,
-            red_bot_name
-        )
+        self.blue_bot_name = blue_bot_name
+        self.red_bot_name = red_bot_name
+        self.summary_only = summary_only
+        if action_log and not summary_only:
+            self.action_log = ActionLog(
+                self.game_name,
+                self.map,
+                map_path,
+                blue_bot_name,
+                red_bot_name,
+                self.seed,
+                self.blue_failed_init,
+                self.red_failed_init
+            )
+        elif not summary_only:
+            self.replay = Replay(
+                self.game_name,
+                self.map,
+                blue_bot_name,
+                red_bot_name,
+                stream=True,
+                keyframe_interval=replay_keyframe_interval,
+                columnar=columnar_replay,
+                background=background_replay
+            )
+
+        self.init_controllers()
+
+    def setup(self, map_path: str, seed: int = None, render=False, render_fps=None, render_every=1):
+        '''
+        Sets up the map, game state, tie-breaking and rendering of a game that records nothing.
+        Shared by every way of running a game, with or without bots (see src/action_replay.py).
+        '''
+        if render_fps is not None and render_fps <= 0:
+            raise ValueError(f"Render frame rate must be positive, got {render_fps}")
+        if render_every <= 0:
+            raise ValueError(f"Render interval must be positive, got {render_every}")
+        self.render = render
+
+        # With a render_fps, the game is rendered in its own process at that frame rate, from snapshots of
+        # the game, instead of before every turn. Either way only every render_every-th turn is rendered.
+        self.map_path = map_path
+        self.render_fps = render_fps
+        self.render_every = render_every
+        self.live_renderer = None
+
+        # ties are broken by a seeded coin flip, so a game can be re-simulated from its action log
+        if seed is None:
+            seed = int.from_bytes(os.urandom(4), "little")
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        # initialize map
+        self.map = load_map(map_path)
+
+        # initialize game_state
+        self.gs = GameState(self.map)
+
+        self.summary_only = False
+        self.summary = None
+        self.replay = None
+        self.action_log = None
+
+        # player workers are started on each player's first turn
+        self.workers = {Team.BLUE: None, Team.RED: None}
+
+    def init_controllers(self):
+        '''
+        Creates each team's controller, once the game's action log (if any) is set up
+        '''
+        self.blue_controller = RobotController(Team.BLUE, self.gs, self.action_log)
+        self.red_controller = RobotController(Team.RED, self.gs, self.action_log)
 
-        # initialize controllers
-        self.blue_controller = RobotController(Team.BLUE, self.gs)
-        self.red_controller = RobotController(Team.RED, self.gs)
-        
     def run_turn(self):
         self.gs.start_turn()
 
@@ -119,6 +178,12 @@ class Game:
         blue_success = self.call_player_code(Team.BLUE)
         red_success = self.call_player_code(Team.RED)
 
+        if self.action_log is not None:
+            if not blue_success:
+                self.action_log.add_failure(self.gs.turn, Team.BLUE)
+            if not red_success:
+                self.action_log.add_failure(self.gs.turn, Team.RED)
+
         if not blue_success and not blue_success:  # Both failed
             return self.calculate_winner()
         if not blue_success:
@@ -132,28 +197,37 @@ class Game:
         player = self.blue_player if team == Team.BLUE else self.red_player
         controller = self.blue_controller if team == Team.BLUE else self.red_controller
 
-        # Create a thread that runs player.play_turn.
+        # Start a thread that runs player.play_turn every time we ask it to.
         # This function might not exist if the player code is broken, so we need to handle that.
-        try:
-            thread = Thread(target=player.play_turn, args=[controller], daemon=True)
-        except:
-            print(f"Failed to call player code for {team}. Are you inheriting the Player class?")
-            return False
+        if self.workers[team] is None:
+            try:
+                self.workers[team] = PlayerWorker(player.play_turn)
+            except:
+                print(f"Failed to call player code for {team}. Are you inheriting the Player class?")
+                return False
+        worker = self.workers[team]
 
         # Run in separate thread with time limit
         funcTime = time.time()
-        thread.start()
-        thread.join(self.gs.time_remaining[team])
+        finished = worker.call(controller, self.gs.time_remaining[team])
         funcTime = time.time() - funcTime
 
         # Check if thread timed out
-        if thread.is_alive() or funcTime > self.gs.time_remaining[team]:
+        if not finished or funcTime > self.gs.time_remaining[team]:
             self.gs.time_remaining[team] = 0
             return False
         
         self.gs.time_remaining[team] -= funcTime
+        if self.action_log is not None:
+            self.action_log.add_time(team, funcTime)
         return True
     
+    def stop_workers(self):
+        for team in Team:
+            if self.workers[team] is not None:
+                self.workers[team].stop()
+                self.workers[team] = None
+
     def calculate_winner(self):
         # Check if one team has more health than the other
         if self.gs.health[Team.BLUE] != self.gs.health[Team.RED]:
@@ -174,24 +248,59 @@ class Game:
                 return Team.BLUE
         
         # Winner is decided by coin flip
-        return random.choice([Team.BLUE, Team.RED])
+        return self.rng.choice([Team.BLUE, Team.RED])
     
+    def record_summary(self, winner: Team):
+        '''
+        In summary_only mode, writes the result of the game, including games that ended because a bot failed to initialize
+        '''
+        if not self.summary_only:
+            return
+        self.summary = get_summary(
+            self.game_name,
+            self.map.name,
+            self.blue_bot_name,
+            self.red_bot_name,
+            self.seed,
+            self.gs,
+            winner,
+            self.blue_failed_init,
+            self.red_failed_init
+        )
+        write_summary(self.summary)
+
     def run_game(self):
         # Check if we initialized successfully
         if self.blue_failed_init:
             print("Blue failed to initialize. Red wins.")
+            self.record_summary(Team.RED)
             return Team.RED
         elif self.red_failed_init:
             print("Red failed to initialize. Blue wins.")
+            self.record_summary(Team.BLUE)
             return Team.BLUE
 
         # Both players initialized successfully; we can start the game
+        if self.render and self.render_fps is not None:
+            self.live_renderer = LiveRenderer(self.map_path, self.render_fps, self.render_every)
         while(True):
-            if self.render:
+            if self.live_renderer is not None:
+                self.live_renderer.push(self.gs)
+            elif self.render and self.gs.turn % self.render_every == 0:
                 self.gs.render()
             winner = self.run_turn()
-            self.replay.add_turn(self.gs)
+            if self.replay is not None:
+                self.replay.add_turn(self.gs)
             if winner is not None:
-                self.replay.set_winner(winner)
-                self.replay.write_json()
+                self.stop_workers()
+                if self.live_renderer is not None:
+                    self.live_renderer.close(self.gs)
+                    self.live_renderer = None
+                if self.replay is not None:
+                    self.replay.set_winner(winner)
+                    self.replay.write_json()
+                if self.action_log is not None:
+                    self.action_log.set_result(winner, self.gs)
+                    self.action_log.write_json()
+                self.record_summary(winner)
                 return winner
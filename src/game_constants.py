@@ -39,6 +39,15 @@ class SnipePriority(Enum):
     WEAK = 3
     STRONG = 4
 
+class ActionType(Enum):
+    BUILD_TOWER = 0
+    SELL_TOWER = 1
+    SNIPE = 2
+    BOMB = 3
+    AUTO_SNIPE = 4
+    AUTO_BOMB = 5
+    SEND_DEBRIS = 6
+
 def get_debris_schedule(turn_num: int):
     '''
     Returns the balloon to be spawned this turn as (cooldown, health)
@@ -1,17 +1,26 @@
 from __future__ import annotations
-import math
 
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
-from src.game_constants import GameConstants, Team, Tile, TowerType
-from src.map import Map
+from src.game_constants import GameConstants, Team, TowerType
+from src.map import Map, get_offsets_within_radius_squared
+from src.map_analysis import get_map_analysis
 from src.debris import Debris
+from src.tower import Tower
+from src.id_allocator import IdAllocator
+
+REINFORCER_OFFSETS = get_offsets_within_radius_squared(TowerType.REINFORCER.range)
+TOWER_TYPES_BY_RANGE = {tower_type.range: tower_type for tower_type in TowerType}
 
 class GameState:
     def __init__(self, map: Map):
         self.map = map
         self.towers = {Team.BLUE: {}, Team.RED: {}}
+        self.tower_locations = {Team.BLUE: {}, Team.RED: {}} # (x, y) -> tower id, kept in sync with towers
+        self.num_reinforcers = {Team.BLUE: {}, Team.RED: {}} # tower id -> number of reinforcers in range of it
         self.debris = {Team.BLUE: {}, Team.RED: {}}
+        # debris bucketed by progress along the path, kept in sync with debris
+        self.debris_by_progress = {team: [{} for i in range(map.path_length)] for team in Team}
         self.time_remaining = {Team.BLUE: GameConstants.INITIAL_TIME_POOL, Team.RED: GameConstants.INITIAL_TIME_POOL}
         self.balance = {Team.BLUE: GameConstants.STARTING_BALANCE, Team.RED: GameConstants.STARTING_BALANCE}
         self.health = {Team.BLUE: GameConstants.STARTING_HEALTH, Team.RED: GameConstants.STARTING_HEALTH}
@@ -21,6 +30,10 @@ class GameState:
         self.has_rendered = False
         self.sent_debris = {Team.BLUE: None, Team.RED: None}
 
+        # ids are allocated per game, so many games can run in one process
+        self.tower_ids = IdAllocator()
+        self.debris_ids = IdAllocator()
+
     def start_turn(self):
         self.current_snipes = {Team.BLUE: [], Team.RED: []}
         self.current_bombs = {Team.BLUE: [], Team.RED: []}
@@ -28,17 +41,67 @@ class GameState:
     
     def spawn_debris(self, team: Team, cooldown: int, health: int, sent_by_opponent: bool):
         loc = self.map.path[0]
-        debris = Debris(team, loc[0], loc[1], cooldown, health, sent_by_opponent)
+        debris = Debris(team, loc[0], loc[1], cooldown, health, sent_by_opponent, self.debris_ids.allocate())
         self.debris[team][debris.id] = debris
+        self.debris_by_progress[team][0][debris.id] = debris
+
+    def add_tower(self, team: Team, tower_type: TowerType, x: int, y: int) -> Tower:
+        tower = Tower(team, tower_type, x, y, self.tower_ids.allocate())
+        self.towers[team][tower.id] = tower
+        self.tower_locations[team][(x, y)] = tower.id
+
+        # Count the reinforcers boosting the new tower, and boost its neighbors if it is a reinforcer
+        num_reinforcers = 0
+        for (dx, dy) in REINFORCER_OFFSETS:
+            other_id = self.tower_locations[team].get((x + dx, y + dy))
+            if other_id is None:
+                continue
+            if self.towers[team][other_id].type == TowerType.REINFORCER:
+                num_reinforcers += 1
+            if tower_type == TowerType.REINFORCER and other_id != tower.id:
+                self.num_reinforcers[team][other_id] += 1
+        self.num_reinforcers[team][tower.id] = num_reinforcers
+        return tower
+
+    def remove_tower(self, team: Team, tower_id: int):
+        tower = self.towers[team].pop(tower_id)
+        del self.tower_locations[team][(tower.x, tower.y)]
+        del self.num_reinforcers[team][tower_id]
+
+        if tower.type == TowerType.REINFORCER:
+            for (dx, dy) in REINFORCER_OFFSETS:
+                other_id = self.tower_locations[team].get((tower.x + dx, tower.y + dy))
+                if other_id is not None:
+                    self.num_reinforcers[team][other_id] -= 1
 
     def is_placeable(self, team: Team, x: int, y: int) -> bool:
         if not self.map.is_space(x, y):
             return False
-        for tower in self.towers[team].values():
-            if (tower.x, tower.y) == (x, y):
-                return False
-        return True
-    
+        return (x, y) not in self.tower_locations[team]
+
+    def get_debris_within_radius_squared(self, team: Team, x: int, y: int, r2: int) -> list[Debris]:
+        '''
+        Returns the team's debris within r2 of (x, y), in the order they were spawned.
+        Radii of tower types on the map use the precomputed coverage of that tower type; any other radius
+        (or a point off the map) is a scan of the team's debris.
+        '''
+        tower_type = TOWER_TYPES_BY_RANGE.get(r2)
+        if tower_type is not None and type(x) == int and type(y) == int and self.map.is_in_bounds(x, y):
+            return self.get_debris_in_range_of_tower(team, tower_type, x, y)
+        return [deb for deb in self.debris[team].values() if (deb.x - x)**2 + (deb.y - y)**2 <= r2]
+
+    def get_debris_in_range_of_tower(self, team: Team, tower_type: TowerType, x: int, y: int) -> list[Debris]:
+        '''
+        Returns the team's debris in range of a tower of tower_type at (x, y), in the order they were spawned.
+        Only the path tiles in range (from the map's MapAnalysis) are looked at, rather than every debris.
+        '''
+        res = []
+        buckets = self.debris_by_progress[team]
+        for i in get_map_analysis(self.map).get_path_indices_in_range(tower_type, x, y):
+            res.extend(buckets[i].values())
+        res.sort(key=lambda debris: debris.id)
+        return res
+
     def damage_debris(self, debris_id: int, damage: int):
         team = None
         if debris_id in self.debris[Team.BLUE]:
@@ -48,9 +111,11 @@ class GameState:
         if team is None:
             raise Exception("Bug in game engine. Tried to damage non-existent debris.")
         
-        self.debris[team][debris_id].health -= damage
-        if self.debris[team][debris_id].health <= 0:
+        debris = self.debris[team][debris_id]
+        debris.health -= damage
+        if debris.health <= 0:
             del self.debris[team][debris_id]
+            del self.debris_by_progress[team][debris.progress][debris_id]
     
     def advance_debris(self):
         for team in Team:
@@ -60,6 +125,7 @@ class GameState:
                     continue
                 else:
                     debris.current_cooldown = debris.total_cooldown
+                    del self.debris_by_progress[team][debris.progress][debris.id]
                     debris.progress += 1
                     if debris.progress == len(self.map.path):
                         to_remove.append(debris.id)
@@ -67,162 +133,31 @@ class GameState:
                         self.health[team] = max(0, self.health[team])
                     else:
                         debris.x, debris.y = self.map.path[debris.progress]
+                        self.debris_by_progress[team][debris.progress][debris.id] = debris
             for id in to_remove:
                 del self.debris[team][id]
     
     def get_tower_cooldown_reduction(self, team: Team, tower_id: int) -> float:
-        this_tower = self.towers[team][tower_id]
-
-        num_reinforcers = 0
-        for tower in self.towers[team].values():
-            if tower.type == TowerType.REINFORCER:
-                dist = (tower.x - this_tower.x)**2 + (tower.y - this_tower.y)**2
-                if dist <= TowerType.REINFORCER.range:
-                    num_reinforcers += 1
-        
-        return GameConstants.REINFORCER_COOLDOWN_MULTIPLIER**num_reinforcers
+        return GameConstants.REINFORCER_COOLDOWN_MULTIPLIER**self.num_reinforcers[team][tower_id]
 
-    def render(self):
+    def render(self, process_events: bool = True):
+        '''
+        Draws the game. Callers that handle pygame events themselves (like the replay viewer) pass
+        process_events=False so their key presses aren't thrown away here.
+        '''
         import pygame
-        import pygame.font as font
+        from src.renderer import Renderer
 
         if not self.has_rendered:
             self.has_rendered = True
             pygame.init()
             pygame.display.set_caption("GameState visualizer")
-            self.tile_size = 20
-            self.screen = pygame.display.set_mode((self.map.width*2 * self.tile_size, self.map.height * self.tile_size))
+            self.renderer = Renderer(self.map)
+            self.screen = pygame.display.set_mode(self.renderer.get_size())
         
         # For performance
-        pygame.event.get()
-
-        # Function to get screen coordinates of each map tile in the form ((left, top), (width, height))
-        def get_screen_coords(team, x: int, y: int) -> tuple[tuple[int, int], tuple[int, int]]:
-            left = x * self.tile_size
-            if team == Team.RED: # Red is on the right
-                left += self.map.width * self.tile_size
-            top = (self.map.height - 1 - y) * self.tile_size
-            return ((left, top), (self.tile_size, self.tile_size))
-        
-        # Draw tiles of each team (space is black, path is purple, asteroids are gray)
-        space_color = (50, 50, 50)
-        path_color = (128, 0, 128)
-        asteroid_color = (128, 128, 128)
-        for x in range(self.map.width):
-            for y in range(self.map.height):
-                if self.map.tiles[x][y] == Tile.SPACE:
-                    color = space_color
-                elif self.map.tiles[x][y] == Tile.PATH:
-                    color = path_color
-                else:
-                    color = asteroid_color
-
-                # Draw blue team tile
-                pygame.draw.rect(self.screen, color, get_screen_coords(Team.BLUE, x, y))
-
-                # Draw red team tile
-                pygame.draw.rect(self.screen, color, get_screen_coords(Team.RED, x, y))
-        
-        # Draw blue and red towers as circles
-        for team in [Team.BLUE, Team.RED]:
-            for tower in self.towers[team].values():
-                team = tower.team
-                color = (0, 0, 255) if team == Team.BLUE else (255, 0, 0)
-                ((left, top), (width, height)) = get_screen_coords(team, tower.x, tower.y)
-                center = (left + width/2, top + height/2)
-
-                if tower.type == TowerType.SOLAR_FARM:
-                    innercolor = (255, 255, 0)
-                elif tower.type == TowerType.BOMBER:
-                    innercolor = (0, 0, 0)
-                elif tower.type == TowerType.GUNSHIP:
-                    innercolor = (0, 204, 204)
-                elif tower.type == TowerType.REINFORCER:
-                    innercolor = (0, 204, 0)
-                else:
-                    innercolor = (255, 51, 153)
-
-                pygame.draw.circle(self.screen, color, center, 6)
-                pygame.draw.circle(self.screen, innercolor, center, 4)
-                
-        
-        # Draw debris as text indicating number of debris on that tile
-        counts = {}
-        counts[Team.BLUE] = [[0 for y in range(self.map.height)] for x in range(self.map.width)]
-        counts[Team.RED] = [[0 for y in range(self.map.height)] for x in range(self.map.width)]
-        for team in [Team.BLUE, Team.RED]:
-            for deb in self.debris[team].values():
-                x = deb.x
-                y = deb.y
-                counts[team][x][y] += 1
-        for team in [Team.BLUE, Team.RED]:
-            for x in range(self.map.width):
-                for y in range(self.map.height):
-                    if counts[team][x][y] == 0:
-                        continue
-                    text = font.SysFont('Comic Sans MS', 10).render(str(counts[team][x][y]), True, (255, 255, 255))
-                    ((left, top), (width, height)) = get_screen_coords(team, x, y)
-                    center = (left + width/2, top + height/2)
-                    text_rect = text.get_rect(center=center)
-                    self.screen.blit(text, text_rect)
-        
-        # Draw line separating blue and red sides
-        pygame.draw.line(
-            self.screen,
-            (255, 255, 255),
-            (self.map.width * self.tile_size, 0),
-            (self.map.width * self.tile_size, self.map.height * self.tile_size)
-        )
-
-        # Draw snipes as line from tower to debris
-        for team in [Team.BLUE, Team.RED]:
-            for ((tower_x, tower_y), (debris_x, debris_y)) in self.current_snipes[team]:
-                tower_coords = get_screen_coords(team, tower_x, tower_y)
-                tower_center = (tower_coords[0][0] + tower_coords[1][0] / 2, tower_coords[0][1] + tower_coords[1][1] / 2)
-                debris_coords = get_screen_coords(team, debris_x, debris_y)
-                debris_center = (debris_coords[0][0] + debris_coords[1][0] / 2, debris_coords[0][1] + debris_coords[1][1] / 2)
-                
-                pygame.draw.line(
-                    self.screen,
-                    (0, 0, 255) if team == Team.BLUE else (255, 0, 0),
-                    tower_center,
-                    debris_center
-                )
-        
-        # Draw sprays as circles
-        for team in [Team.BLUE, Team.RED]:
-            for (x, y) in self.current_bombs[team]:
-                ((left, top), (width, height)) = get_screen_coords(team, x, y)
-                center = (left + width/2, top + height/2)
-
-                pygame.draw.circle(
-                    self.screen,
-                    (0, 0, 0),
-                    center,
-                    math.sqrt(TowerType.BOMBER.range) * self.tile_size,
-                    1 # circle outline width
-                )
-
-        # Draw turn number in bottom left
-        text = font.SysFont('Comic Sans MS', 10).render(f"Turn: {self.turn}", True, (255, 255, 255))
-        self.screen.blit(text, ((2, self.screen.get_height()-20), (self.screen.get_width()//2, 20)))
-
-        # Draw each team's balance
-        text = font.SysFont('Comic Sans MS', 10).render(f"Balance: {self.balance[Team.BLUE]}", True, (255, 255, 255))
-        self.screen.blit(text, ((2, 0), (self.screen.get_width()//2, 20)))
-        text = font.SysFont('Comic Sans MS', 10).render(f"Balance: {self.balance[Team.RED]}", True, (255, 255, 255))
-        self.screen.blit(text, ((self.screen.get_width()//2+2, 0), (self.screen.get_width()//2, 20)))
-
-        # Draw each team's health
-        text = font.SysFont('Comic Sans MS', 10).render(f"Health: {self.health[Team.BLUE]}", True, (255, 255, 255))
-        self.screen.blit(text, ((2, 20), (self.screen.get_width()//2, 40)))
-        text = font.SysFont('Comic Sans MS', 10).render(f"Health: {self.health[Team.RED]}", True, (255, 255, 255))
-        self.screen.blit(text, ((self.screen.get_width()//2+2, 20), (self.screen.get_width()//2, 40)))
-
-        # Draw each team's time remaining
-        text = font.SysFont('Comic Sans MS', 10).render(f"Time: {self.time_remaining[Team.BLUE]: .2f}", True, (255, 255, 255))
-        self.screen.blit(text, ((2, 40), (self.screen.get_width()//2, 60)))
-        text = font.SysFont('Comic Sans MS', 10).render(f"Time: {self.time_remaining[Team.RED]: .2f}", True, (255, 255, 255))
-        self.screen.blit(text, ((self.screen.get_width()//2+2, 40), (self.screen.get_width()//2, 60)))
+        if process_events:
+            pygame.event.get()
 
+        self.renderer.draw(self.screen, self)
         pygame.display.update()
@@ -0,0 +1,35 @@
+# Compact end-of-game summaries (replays/<game>.summary.json), written instead of a replay
+# when only the result of a game is needed
+
+import json
+import os
+from src.action_log import get_result
+from src.game_constants import Team
+from src.game_state import GameState
+
+def get_summary(game_name: str, map_name: str, blue_bot: str, red_bot: str, seed: int, gs: GameState, winner: Team,
+                blue_failed_init: bool = False, red_failed_init: bool = False) -> dict:
+    summary = {
+        "game_name": game_name,
+        "map_name": map_name,
+        "blue_bot": blue_bot,
+        "red_bot": red_bot,
+        "seed": seed,
+        "blue_failed_init": blue_failed_init,
+        "red_failed_init": red_failed_init,
+    }
+    summary.update(get_result(gs, winner))
+    summary["blue_time_remaining"] = gs.time_remaining[Team.BLUE]
+    summary["red_time_remaining"] = gs.time_remaining[Team.RED]
+    summary["blue_towers"] = len(gs.towers[Team.BLUE])
+    summary["red_towers"] = len(gs.towers[Team.RED])
+    return summary
+
+def get_summary_path(game_name: str) -> str:
+    return f"replays/{game_name}.summary.json"
+
+def write_summary(summary: dict):
+    path = get_summary_path(summary["game_name"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(summary, f)
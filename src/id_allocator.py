@@ -0,0 +1,8 @@
+class IdAllocator:
+    def __init__(self):
+        self.next_id = 0
+
+    def allocate(self) -> int:
+        res = self.next_id
+        self.next_id += 1
+        return res
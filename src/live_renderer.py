@@ -0,0 +1,110 @@
+# Renders a live game in its own process, so the game never waits on pygame.
+# The game pushes snapshots of its state; the renderer shows the latest one it has at its own frame rate,
+# and snapshots that arrive while it is busy are dropped rather than queued up.
+
+import multiprocessing
+import time
+from queue import Empty, Full
+from typing import NamedTuple
+from src.game_constants import Team
+from src.game_state import GameState
+
+class RenderSnapshot(NamedTuple):
+    '''
+    What Renderer.draw needs from a GameState, made of views so it can be sent to another process
+    '''
+    turn: int
+    balance: dict
+    health: dict
+    time_remaining: dict
+    towers: dict
+    debris: dict
+    current_snipes: dict
+    current_bombs: dict
+
+def get_snapshot(gs: GameState) -> RenderSnapshot:
+    return RenderSnapshot(
+        turn=gs.turn,
+        balance=dict(gs.balance),
+        health=dict(gs.health),
+        time_remaining=dict(gs.time_remaining),
+        towers={team: {id: tower.get_view() for id, tower in gs.towers[team].items()} for team in Team},
+        debris={team: {id: deb.get_view() for id, deb in gs.debris[team].items()} for team in Team},
+        current_snipes={team: list(gs.current_snipes[team]) for team in Team},
+        current_bombs={team: list(gs.current_bombs[team]) for team in Team}
+    )
+
+def run_renderer(map_path: str, snapshots, fps: int):
+    import os
+    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+    import pygame
+    from src.map_cache import load_map
+    from src.renderer import Renderer
+
+    pygame.init()
+    pygame.display.set_caption("GameState visualizer")
+    renderer = Renderer(load_map(map_path))
+    screen = pygame.display.set_mode(renderer.get_size())
+    clock = pygame.time.Clock()
+
+    snapshot = None
+    finished = False
+    while not finished:
+        pygame.event.get()
+
+        # Only the latest snapshot is drawn
+        drawn = snapshot
+        while True:
+            try:
+                item = snapshots.get_nowait()
+            except Empty:
+                break
+            if item is None:  # Game is over
+                finished = True
+                break
+            snapshot = item
+
+        if snapshot is not drawn:
+            renderer.draw(screen, snapshot)
+            pygame.display.update()
+        clock.tick(fps)
+    pygame.quit()
+
+class LiveRenderer:
+    def __init__(self, map_path: str, fps: int = 30, every: int = 1):
+        self.fps = fps
+        self.every = every # only turns divisible by every are rendered
+        self.last_push = 0
+        self.snapshots = multiprocessing.Queue(maxsize=2)
+        self.process = multiprocessing.Process(target=run_renderer, args=(map_path, self.snapshots, fps), daemon=True)
+        self.process.start()
+
+    def push(self, gs: GameState):
+        '''
+        Sends the state of the game to the renderer, unless it isn't a turn to render, the renderer has
+        been sent a snapshot too recently to draw another one, or it hasn't caught up with the last ones.
+        Never waits.
+        '''
+        if gs.turn % self.every != 0:
+            return
+        now = time.perf_counter()
+        if now - self.last_push < 1 / self.fps or self.snapshots.full():
+            return
+        try:
+            self.snapshots.put_nowait(get_snapshot(gs))
+        except Full:
+            return
+        self.last_push = now
+
+    def close(self, gs: GameState, timeout: float = 1.0):
+        '''
+        Shows the final state of the game and stops the renderer, waiting at most about timeout seconds for it
+        '''
+        try:
+            self.snapshots.put(get_snapshot(gs), timeout=timeout)
+            self.snapshots.put(None, timeout=timeout)
+        except Full:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
@@ -1,34 +1,79 @@
 from src.game_constants import Tile
 import os
 import src.map_processor as map_processor
-import ast
+import math
+from functools import cached_property
+from types import MappingProxyType
+from src.compiled_map import load_compiled_map
+
+TILES = {tile.value: tile for tile in Tile}
+
+def get_offsets_within_radius_squared(r2: int) -> list[tuple[int, int]]:
+    r = math.isqrt(r2)
+    return [(dx, dy) for dx in range(-r, r+1) for dy in range(-r, r+1) if dx**2 + dy**2 <= r2]
 
 class Map:
-    def __init__(self, fname: str):
+    '''
+    A Map is immutable once loaded, so the same instance is shared by the engine and both players
+    '''
+    def __init__(self, fname: str, use_compiled: bool = True):
         self.name = os.path.basename(fname).split('.')[0]
-        with open(fname, 'r') as f:
-            arrAsStr = f.readline()
+        self.fname = fname
+
+        # prefer the compiled sidecar when it is up to date, since it needs no parsing
+        self.compiled = load_compiled_map(fname) if use_compiled else None
+        if self.compiled is not None:
+            self.width = self.compiled.width
+            self.height = self.compiled.height
+            path = self.compiled.path
+            self.path = tuple(zip(path[0::2], path[1::2]))
+            compiled_tiles = self.compiled.tiles
+            self.tiles = tuple(
+                tuple(TILES[value] for value in compiled_tiles[x*self.height:(x+1)*self.height])
+                for x in range(self.width)
+            )
+        else:
+            # the file is read and parsed once, for both the tiles and the path
+            arr = map_processor.read_arr(fname)
+            self.height = len(arr)
+            self.width = len(arr[0])
 
-        self.arr = ast.literal_eval(arrAsStr)
-        self.height = len(self.arr)
-        self.width = len(self.arr[0])
+            path = map_processor.get_path_from_arr(arr)
+            self.path = tuple((c, self.height-1-r) for (r, c) in path) # swap xs and ys
 
-        self.path = map_processor.get_path(fname)
-        for i in range(len(self.path)):
-            self.path[i] = (self.path[i][1], self.height-1-self.path[i][0]) # swap xs and ys
+            tiles = [[Tile.SPACE for y in range(self.height)] for x in range(self.width)]
+            for (x, y) in self.path:
+                tiles[x][y] = Tile.PATH
+
+            for x in range(self.width):
+                for y in range(self.height):
+                    if arr[y][x][0] == 'R':
+                        tiles[x][self.height-1-y] = Tile.ASTEROID
+            self.tiles = tuple(tuple(column) for column in tiles)
 
         self.path_length = len(self.path)
-        
-        self.tiles = [[Tile.SPACE for y in range(self.height)] for x in range(self.width)]
-        for i in range(self.path_length):
-            x, y = self.path[i]
-            self.tiles[x][y] = Tile.PATH
-
-        for x in range(self.width):
-            for y in range(self.height):
-                if self.arr[y][x][0] == 'R':
-                    self.tiles[x][self.height-1-y] = Tile.ASTEROID
-    
+        self.path_indices = MappingProxyType({self.path[i]: i for i in range(self.path_length)})
+
+        self.frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, 'frozen', False):
+            raise AttributeError("Map is immutable")
+        super().__setattr__(name, value)
+
+    @cached_property
+    def arr(self) -> tuple:
+        # the raw map array is only needed by tools that inspect the map file itself,
+        # so it is parsed on first use (cached_property bypasses __setattr__)
+        arr = map_processor.read_arr(self.fname)
+        return tuple(tuple(tuple(cell) for cell in row) for row in arr)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     def is_in_bounds(self, x: int, y: int) -> bool:
         return 0 <= x < self.width and 0 <= y < self.height
 
@@ -46,4 +91,3 @@ class Map:
         if not self.is_in_bounds(x, y):
             return False
         return self.tiles[x][y] == Tile.PATH
- 
\ No newline at end of file
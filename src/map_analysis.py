@@ -0,0 +1,82 @@
+# Per-tile tower coverage of a map, computed once per map and shared by the engine and players
+
+import weakref
+from array import array
+from types import MappingProxyType
+from src.game_constants import TowerType
+from src.map import Map, get_offsets_within_radius_squared
+
+def get_coverage(map: Map, tower_type: TowerType) -> tuple[array, array]:
+    '''
+    Returns the (offsets, indices) coverage table of tower_type on the map (see MapAnalysis)
+    '''
+    covered = [[[] for y in range(map.height)] for x in range(map.width)]
+    radius_offsets = get_offsets_within_radius_squared(tower_type.range)
+    for i, (path_x, path_y) in enumerate(map.path):
+        for (dx, dy) in radius_offsets:
+            x, y = path_x + dx, path_y + dy
+            if map.is_in_bounds(x, y):
+                covered[x][y].append(i)
+
+    offsets = array('I', [0])
+    indices = array('I')
+    for column in covered:
+        for tile_indices in column:
+            indices.extend(tile_indices)
+            offsets.append(len(indices))
+    return offsets, indices
+
+class MapAnalysis:
+    '''
+    Like the Map, a MapAnalysis is shared with both players and immutable once built
+    '''
+    def __init__(self, map: Map):
+        self.width = map.width
+        self.height = map.height
+
+        # tower type -> path indices a tower of that type at (x, y) can reach, in path order, are
+        # indices[tower_type][offsets[tower_type][i]:offsets[tower_type][i+1]] where i = x * height + y
+        offsets = {}
+        indices = {}
+
+        # compiled maps already have the tables
+        if map.compiled is not None:
+            for tower_type in TowerType:
+                offsets[tower_type], indices[tower_type] = map.compiled.coverage[tower_type]
+        else:
+            for tower_type in TowerType:
+                offsets[tower_type], indices[tower_type] = get_coverage(map, tower_type)
+
+        # read-only views, so a player can't change the tables the engine uses
+        self.offsets = MappingProxyType({tower_type: memoryview(table).toreadonly() for tower_type, table in offsets.items()})
+        self.indices = MappingProxyType({tower_type: memoryview(table).toreadonly() for tower_type, table in indices.items()})
+        self.frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, 'frozen', False):
+            raise AttributeError("MapAnalysis is immutable")
+        super().__setattr__(name, value)
+
+    def get_path_indices_in_range(self, tower_type: TowerType, x: int, y: int) -> tuple[int, ...]:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return ()
+        i = x * self.height + y
+        offsets = self.offsets[tower_type]
+        return tuple(self.indices[tower_type][offsets[i]:offsets[i+1]])
+
+    def get_num_path_tiles_in_range(self, tower_type: TowerType, x: int, y: int) -> int:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return 0
+        i = x * self.height + y
+        offsets = self.offsets[tower_type]
+        return offsets[i+1] - offsets[i]
+
+_analyses = weakref.WeakKeyDictionary()
+
+def get_map_analysis(map: Map) -> MapAnalysis:
+    '''
+    Returns the MapAnalysis of the map, computing it only the first time it is asked for
+    '''
+    if map not in _analyses:
+        _analyses[map] = MapAnalysis(map)
+    return _analyses[map]
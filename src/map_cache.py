@@ -0,0 +1,62 @@
+# Process-wide cache of loaded maps, so that running the same map many times in one process
+# (e.g. in a tournament worker) only reads, parses and walks it once
+
+import hashlib
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple
+from src.map import Map
+
+class MapCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+class MapCache:
+    '''
+    Least recently used cache of Maps, keyed by the map's name and a hash of its file contents,
+    so an edited map file is reloaded. Maps are immutable, so a cached Map can be shared by any number of games.
+    '''
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self.maps = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def get(self, fname: str) -> Map:
+        with open(fname, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=16).digest()
+        key = (os.path.basename(fname), digest)
+
+        with self.lock:
+            if key in self.maps:
+                self.hits += 1
+                self.maps.move_to_end(key)
+                return self.maps[key]
+            self.misses += 1
+
+        map = Map(fname)
+        with self.lock:
+            self.maps[key] = map
+            self.maps.move_to_end(key)
+            while len(self.maps) > self.maxsize:
+                self.maps.popitem(last=False)
+        return map
+
+    def cache_info(self) -> MapCacheInfo:
+        with self.lock:
+            return MapCacheInfo(self.hits, self.misses, self.maxsize, len(self.maps))
+
+    def clear(self):
+        with self.lock:
+            self.maps.clear()
+            self.hits = 0
+            self.misses = 0
+
+map_cache = MapCache()
+
+def load_map(fname: str) -> Map:
+    return map_cache.get(fname)
@@ -1,3 +1,6 @@
+import ast
+import json
+
 def print2DArr (bools):
     for i in range(len(bools)):
         for j in range(len(bools[0])):
@@ -48,33 +51,46 @@ def getPoints (arr, n, m):
     return points
 
 # modifies path list to contain in-order coordinates of balloon path location, starting from r, c
-def floodFill (arr, bools, r, c, n, m, path): 
-    # out of bounds
-    if r < 0 or r >= n or c < 0 or c >= m:
-        return False
-    # already seen
-    if bools[r][c]:
-        return False
-    # valid path
-    if arr[r][c][0] == 'P':
+# walks the path with an explicit stack (rather than recursion) so long paths can't overflow the call stack.
+# neighbors are visited in the same order as a recursive depth-first search: down, left, up, right
+def floodFill (arr, bools, r, c, n, m, path):
+    stack = [(r, c)]
+    while stack:
+        r, c = stack.pop()
+        # out of bounds
+        if r < 0 or r >= n or c < 0 or c >= m:
+            continue
+        # already seen
+        if bools[r][c]:
+            continue
+        # not a path
+        if arr[r][c][0] != 'P':
+            continue
+
+        # valid path
         path.append([r, c])
         bools[r][c] = True
-    # not a path
-    else:
-        return False
-    
-    floodFill(arr, bools, r+1, c, n, m, path)
-    floodFill(arr, bools, r, c-1, n, m, path)
-    floodFill(arr, bools, r-1, c, n, m, path)
-    floodFill(arr, bools, r, c+1, n, m, path)
 
-def get_path(fname):
-    import ast
-    file = open(fname, 'r')
-    arrAsStr = file.readline()
-    file.close()
+        # pushed in reverse, so the first neighbor is explored first
+        stack.append((r, c+1))
+        stack.append((r-1, c))
+        stack.append((r, c-1))
+        stack.append((r+1, c))
+
+# reads the map array from the first line of a .awap24m file.
+# map files are written as JSON, which json parses much faster than ast.literal_eval;
+# anything that isn't valid JSON falls back to literal_eval
+def read_arr(fname):
+    with open(fname, 'r') as file:
+        arrAsStr = file.readline()
 
-    arr = ast.literal_eval(arrAsStr)
+    try:
+        return json.loads(arrAsStr)
+    except json.JSONDecodeError:
+        return ast.literal_eval(arrAsStr)
+
+# returns the in-order [row, col] coordinates of the balloon path of an already parsed map array
+def get_path_from_arr(arr):
     n = len(arr)
     m = len(arr[0])
     bools = [[False for i in range(m)] for j in range(n)]
@@ -83,8 +99,11 @@ def get_path(fname):
 
     path = []
     for corr in points :
-        if(corr not in path):
+        if not bools[corr[0]][corr[1]]: # not already part of the path
             currPath = []
             floodFill(arr, bools, corr[0], corr[1], n, m, currPath)
             path.extend(currPath)
     return path
+
+def get_path(fname):
+    return get_path_from_arr(read_arr(fname))
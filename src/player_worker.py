@@ -0,0 +1,40 @@
+# Long-lived thread that runs a player's play_turn whenever the game asks it to,
+# so that we don't have to start a new thread for every turn
+
+import traceback
+from queue import Queue, Empty
+from threading import Thread
+
+class PlayerWorker:
+    def __init__(self, play_turn):
+        self.play_turn = play_turn
+        self.requests = Queue()
+        self.results = Queue()
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            controller = self.requests.get()
+            if controller is None:  # Game is over
+                return
+            try:
+                self.play_turn(controller)
+            except:
+                traceback.print_exc()
+            self.results.put(True)
+
+    def call(self, controller, timeout: float) -> bool:
+        '''
+        Asks the worker to play a turn and waits at most timeout seconds for it.
+        Returns False if the turn didn't finish in time.
+        '''
+        self.requests.put(controller)
+        try:
+            self.results.get(timeout=max(0, timeout))
+        except Empty:
+            return False
+        return True
+
+    def stop(self):
+        self.requests.put(None)
@@ -0,0 +1,130 @@
+# Draws a game with pygame. Everything that doesn't change during a game (fonts, the map's tiles)
+# is prepared once, so each frame only draws the towers, debris, shots and text of the current turn.
+
+import math
+import pygame
+from src.game_constants import Team, Tile, TowerType
+from src.map import Map
+
+TILE_SIZE = 20
+FONT_NAME = 'Comic Sans MS'
+FONT_SIZE = 10
+TEXT_COLOR = (255, 255, 255)
+
+# Tile colors (space is black, path is purple, asteroids are gray)
+TILE_COLORS = {
+    Tile.SPACE: (50, 50, 50),
+    Tile.PATH: (128, 0, 128),
+    Tile.ASTEROID: (128, 128, 128),
+}
+TEAM_COLORS = {Team.BLUE: (0, 0, 255), Team.RED: (255, 0, 0)}
+TOWER_COLORS = {
+    TowerType.SOLAR_FARM: (255, 255, 0),
+    TowerType.BOMBER: (0, 0, 0),
+    TowerType.GUNSHIP: (0, 204, 204),
+    TowerType.REINFORCER: (0, 204, 0),
+}
+
+class Renderer:
+    def __init__(self, map: Map, tile_size: int = TILE_SIZE):
+        self.map = map
+        self.tile_size = tile_size
+        pygame.font.init()
+        self.font = pygame.font.SysFont(FONT_NAME, FONT_SIZE)
+        self.background = None # the map's tiles, drawn on the first frame in the format of the target surface
+        self.count_labels = {} # number of debris -> rendered label
+
+    def get_size(self) -> tuple[int, int]:
+        return (self.map.width * 2 * self.tile_size, self.map.height * self.tile_size)
+
+    # Screen coordinates of a map tile, in the form ((left, top), (width, height))
+    def get_screen_coords(self, team: Team, x: int, y: int) -> tuple[tuple[int, int], tuple[int, int]]:
+        left = x * self.tile_size
+        if team == Team.RED: # Red is on the right
+            left += self.map.width * self.tile_size
+        top = (self.map.height - 1 - y) * self.tile_size
+        return ((left, top), (self.tile_size, self.tile_size))
+
+    def get_center(self, team: Team, x: int, y: int) -> tuple[float, float]:
+        ((left, top), (width, height)) = self.get_screen_coords(team, x, y)
+        return (left + width/2, top + height/2)
+
+    def draw_background(self, surface: pygame.Surface) -> pygame.Surface:
+        background = pygame.Surface(self.get_size(), 0, surface)
+        for x in range(self.map.width):
+            for y in range(self.map.height):
+                color = TILE_COLORS[self.map.tiles[x][y]]
+                pygame.draw.rect(background, color, self.get_screen_coords(Team.BLUE, x, y))
+                pygame.draw.rect(background, color, self.get_screen_coords(Team.RED, x, y))
+
+        # Line separating blue and red sides
+        pygame.draw.line(
+            background,
+            (255, 255, 255),
+            (self.map.width * self.tile_size, 0),
+            (self.map.width * self.tile_size, self.map.height * self.tile_size)
+        )
+        return background
+
+    def get_count_label(self, count: int) -> pygame.Surface:
+        if count not in self.count_labels:
+            self.count_labels[count] = self.font.render(str(count), True, TEXT_COLOR)
+        return self.count_labels[count]
+
+    def draw(self, surface: pygame.Surface, gs):
+        '''
+        Draws gs (a GameState, or anything with the same turn, balance, health, time_remaining, towers, debris,
+        current_snipes and current_bombs) onto surface, which doesn't have to be the display
+        '''
+        if self.background is None:
+            self.background = self.draw_background(surface)
+        surface.blit(self.background, (0, 0))
+
+        # Draw blue and red towers as circles
+        for team in [Team.BLUE, Team.RED]:
+            for tower in gs.towers[team].values():
+                center = self.get_center(tower.team, tower.x, tower.y)
+                pygame.draw.circle(surface, TEAM_COLORS[tower.team], center, 6)
+                pygame.draw.circle(surface, TOWER_COLORS.get(tower.type, (255, 51, 153)), center, 4)
+
+        # Draw debris as text indicating number of debris on that tile
+        for team in [Team.BLUE, Team.RED]:
+            counts = {}
+            for deb in gs.debris[team].values():
+                counts[(deb.x, deb.y)] = counts.get((deb.x, deb.y), 0) + 1
+            for (x, y), count in counts.items():
+                text = self.get_count_label(count)
+                surface.blit(text, text.get_rect(center=self.get_center(team, x, y)))
+
+        # Draw snipes as line from tower to debris
+        for team in [Team.BLUE, Team.RED]:
+            for ((tower_x, tower_y), (debris_x, debris_y)) in gs.current_snipes[team]:
+                pygame.draw.line(
+                    surface,
+                    TEAM_COLORS[team],
+                    self.get_center(team, tower_x, tower_y),
+                    self.get_center(team, debris_x, debris_y)
+                )
+
+        # Draw sprays as circles
+        for team in [Team.BLUE, Team.RED]:
+            for (x, y) in gs.current_bombs[team]:
+                pygame.draw.circle(
+                    surface,
+                    (0, 0, 0),
+                    self.get_center(team, x, y),
+                    math.sqrt(TowerType.BOMBER.range) * self.tile_size,
+                    1 # circle outline width
+                )
+
+        width = surface.get_width()
+        height = surface.get_height()
+
+        # Draw turn number in bottom left
+        surface.blit(self.font.render(f"Turn: {gs.turn}", True, TEXT_COLOR), ((2, height-20), (width//2, 20)))
+
+        # Draw each team's balance, health and time remaining
+        for team, left in [(Team.BLUE, 2), (Team.RED, width//2+2)]:
+            surface.blit(self.font.render(f"Balance: {gs.balance[team]}", True, TEXT_COLOR), ((left, 0), (width//2, 20)))
+            surface.blit(self.font.render(f"Health: {gs.health[team]}", True, TEXT_COLOR), ((left, 20), (width//2, 40)))
+            surface.blit(self.font.render(f"Time: {gs.time_remaining[team]: .2f}", True, TEXT_COLOR), ((left, 40), (width//2, 60)))
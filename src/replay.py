@@ -1,7 +1,12 @@
 from dataclasses import dataclass
+import gzip
+import json
+import os
 import compress_json
-from src.game_constants import Team, TowerType
-from src.game_state import GameState
+from src.columnar_replay import ColumnarReplayWriter
+from src.replay_writer import ReplayWriter
+from src.game_constants import GameConstants, Team, TowerType
+from src.game_state import GameState, REINFORCER_OFFSETS
 from src.map import Map
 from typing import List
 
@@ -54,6 +59,177 @@ class ReplayMetadata:
     blue_bot: str
     winner: str
     scores: List[float]
+    keyframe_interval: int = None # set for delta-encoded replays
+    predicted_deltas: bool = False # deltas are changes from TurnPredictor's prediction rather than from the turn before
+
+SCALAR_FIELDS = [
+    "blue_balance", "red_balance", "blue_health", "red_health", "blue_time_remaining", "red_time_remaining"
+]
+ENTITY_FIELDS = ["blue_towers", "red_towers", "blue_debris", "red_debris"]
+EVENT_FIELDS = ["blue_snipes", "red_snipes", "blue_bombs", "red_bombs"]
+
+class TurnPredictor:
+    '''
+    Predicts the towers and debris of the turn after a full turn, assuming nothing happens but time passing:
+    tower cooldowns count down (faster next to reinforcers) and solar farms reset when they pay out,
+    and debris cooldowns count down and debris steps along the path when its cooldown runs out.
+    Deltas only store where the real turn differs from this, mostly spawns, removals, damage and towers firing.
+    '''
+    def __init__(self, path: list):
+        self.path = [tuple(loc) for loc in path]
+        self.path_indices = {loc: i for i, loc in enumerate(self.path)}
+
+    def predict(self, previous: dict) -> dict:
+        '''
+        Returns the predicted entities of the turn after previous, as field -> id -> entity
+        '''
+        predicted = {}
+        for field in ["blue_towers", "red_towers"]:
+            num_reinforcers = {}
+            for tower in previous[field]:
+                if tower["type"] == "reinforcer":
+                    for (dx, dy) in REINFORCER_OFFSETS:
+                        loc = (tower["x"] + dx, tower["y"] + dy)
+                        num_reinforcers[loc] = num_reinforcers.get(loc, 0) + 1
+            towers = {}
+            for tower in previous[field]:
+                reduction = GameConstants.REINFORCER_COOLDOWN_MULTIPLIER**num_reinforcers.get((tower["x"], tower["y"]), 0)
+                cooldown = max(0, tower["cooldown"] - reduction)
+                if tower["type"] == "solar_farm" and cooldown == 0:
+                    cooldown = tower["max_cooldown"]
+                towers[tower["id"]] = {**tower, "cooldown": cooldown}
+            predicted[field] = towers
+        for field in ["blue_debris", "red_debris"]:
+            debris = {}
+            for deb in previous[field]:
+                deb = {**deb, "cooldown": max(0, deb["cooldown"] - 1)}
+                if deb["cooldown"] == 0:
+                    deb["cooldown"] = deb["max_cooldown"]
+                    i = self.path_indices.get((deb["x"], deb["y"]), len(self.path)) + 1
+                    if i < len(self.path):
+                        deb["x"], deb["y"] = self.path[i]
+                debris[deb["id"]] = deb
+            predicted[field] = debris
+        return predicted
+
+def get_turn_predictor(metadata: dict):
+    '''
+    Returns the TurnPredictor the deltas of a replay were encoded with, or None if they are plain changes
+    '''
+    if metadata.get("predicted_deltas", False):
+        return TurnPredictor(metadata["map_path"])
+    return None
+
+def encode_delta(previous: dict, turn: dict, predictor: TurnPredictor = None) -> dict:
+    '''
+    Returns the changes from the full turn previous to the full turn turn.
+    Scalars are only stored when they change; towers and debris are stored as the entities
+    added, the ids removed, and the changed fields (plus id) of entities that changed.
+    With a predictor, entities are compared to their predicted state instead of their previous one.
+    '''
+    delta = {"delta": True, "turn_number": turn["turn_number"]}
+    for field in SCALAR_FIELDS:
+        if turn[field] != previous[field]:
+            delta[field] = turn[field]
+    for field in EVENT_FIELDS:
+        if len(turn[field]) > 0:
+            delta[field] = turn[field]
+    predicted = predictor.predict(previous) if predictor is not None else None
+    for field in ENTITY_FIELDS:
+        if predicted is not None:
+            previous_entities = predicted[field]
+        else:
+            previous_entities = {entity["id"]: entity for entity in previous[field]}
+        added = []
+        changed = []
+        for entity in turn[field]:
+            previous_entity = previous_entities.pop(entity["id"], None)
+            if previous_entity is None:
+                added.append(entity)
+                continue
+            changes = {key: value for key, value in entity.items() if previous_entity[key] != value}
+            if len(changes) > 0:
+                changes["id"] = entity["id"]
+                changed.append(changes)
+        if len(added) > 0:
+            delta[f"{field}_added"] = added
+        if len(previous_entities) > 0:
+            delta[f"{field}_removed"] = list(previous_entities.keys())
+        if len(changed) > 0:
+            delta[f"{field}_changed"] = changed
+    return delta
+
+def apply_delta(previous: dict, delta: dict, predictor: TurnPredictor = None) -> dict:
+    '''
+    Returns the full turn obtained by applying delta (from encode_delta, with the same predictor) to the full turn previous
+    '''
+    turn = {"turn_number": delta["turn_number"]}
+    for field in SCALAR_FIELDS:
+        turn[field] = delta.get(field, previous[field])
+    predicted = predictor.predict(previous) if predictor is not None else None
+    for field in ENTITY_FIELDS:
+        if predicted is not None:
+            entities = predicted[field]
+        else:
+            entities = {entity["id"]: entity for entity in previous[field]}
+        for id in delta.get(f"{field}_removed", []):
+            del entities[id]
+        for changes in delta.get(f"{field}_changed", []):
+            entities[changes["id"]] = {**entities[changes["id"]], **changes}
+        for entity in delta.get(f"{field}_added", []):
+            entities[entity["id"]] = entity
+        turn[field] = list(entities.values())
+    for field in EVENT_FIELDS:
+        turn[field] = delta.get(field, [])
+    return turn
+
+def get_full_turns(replay: dict):
+    '''
+    Yields every turn of a loaded replay as a full turn, decoding delta-encoded replays
+    '''
+    predictor = get_turn_predictor(replay["metadata"])
+    previous = None
+    for turn in replay["turns"]:
+        if turn.get("delta", False):
+            turn = apply_delta(previous, turn, predictor)
+        yield turn
+        previous = turn
+
+class TurnIndex:
+    '''
+    Random access to the full turns of a loaded replay (JSON, delta-encoded, columnar or action log).
+    A delta-encoded turn is decoded from the keyframe before it, or from the last turn asked for if that is closer,
+    so seeking costs at most keyframe_interval deltas and stepping forward costs one.
+    '''
+    def __init__(self, replay: dict):
+        turns = replay["turns"]
+        if not hasattr(turns, "__len__"): # action logs are re-simulated as they are iterated
+            turns = list(turns)
+        self.turns = turns
+        self.keyframe_interval = replay["metadata"].get("keyframe_interval")
+        self.predictor = get_turn_predictor(replay["metadata"])
+        self.last = None # (index, full turn) of the last turn asked for
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def get_turn(self, i: int) -> dict:
+        if hasattr(self.turns, "get_turn"): # columnar replays have their own index
+            return self.turns.get_turn(i)
+        turn = self.turns[i]
+        if not turn.get("delta", False):
+            self.last = (i, turn)
+            return turn
+
+        start = i - i % self.keyframe_interval
+        if self.last is not None and start <= self.last[0] <= i:
+            start, turn = self.last
+        else:
+            turn = self.turns[start]
+        for j in range(start + 1, i + 1):
+            turn = apply_delta(turn, self.turns[j], self.predictor)
+        self.last = (i, turn)
+        return turn
 
 class Replay:
     def __init__(
@@ -61,8 +237,14 @@ class Replay:
             game_name: str,
             map: Map,
             blue_bot: str,
-            red_bot: str
+            red_bot: str,
+            stream: bool = False,
+            keyframe_interval: int = None,
+            columnar: bool = False,
+            background: bool = False
     ):
+        if keyframe_interval is not None and (not isinstance(keyframe_interval, int) or keyframe_interval <= 0):
+            raise ValueError(f"Replay keyframe interval must be a positive integer, got {keyframe_interval!r}")
         self.metadata = ReplayMetadata(
             game_name=game_name,
             map_name=map.name,
@@ -72,11 +254,80 @@ class Replay:
             blue_bot=blue_bot,
             red_bot=red_bot,
             winner="none",
-            scores=[0.0, 0.0]
+            scores=[0.0, 0.0],
+            keyframe_interval=keyframe_interval,
+            predicted_deltas=keyframe_interval is not None
         )
         self.turns = []
 
+        # With a keyframe interval, only every keyframe_interval-th turn is stored in full and
+        # the turns in between are stored as deltas from the turn before them
+        self.keyframe_interval = keyframe_interval
+        self.predictor = TurnPredictor(map.path) if keyframe_interval is not None else None
+        self.previous_turn = None
+        self.num_turns = 0
+
+        # When streaming, each turn is written to the gzip file as soon as it is added, instead
+        # of being kept in self.turns, so memory use doesn't grow with the length of the game.
+        # Turns come before metadata in the file, since the winner is only known at the end.
+        # The file is opened on the first turn, so games that never start don't leave one behind.
+        self.streaming = stream
+        self.stream = None
+
+        # Columnar replays are always written turn by turn, and store every turn in full
+        self.columnar = columnar
+        self.columnar_writer = None
+
+        # In the background, turns are only captured on the game's thread; encoding them and
+        # writing them out happens on a ReplayWriter thread, started on the first turn
+        self.background = background
+        self.writer = None
+
+    def get_path(self) -> str:
+        if self.columnar:
+            return f"replays/{self.metadata.game_name}.awap24rc"
+        return f"replays/{self.metadata.game_name}.awap24r.gz"
+
+    def open_stream(self):
+        path = self.get_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.stream = gzip.open(path, "wt", encoding="utf-8")
+        self.stream.write('{"turns": [')
+
     def add_turn(self, gs: GameState):
+        turn = self.get_turn(gs)
+        if self.background:
+            if self.writer is None:
+                self.writer = ReplayWriter()
+            self.writer.submit(self.write_turn, turn)
+        else:
+            self.write_turn(turn)
+
+    def write_turn(self, turn: dict):
+        if self.columnar:
+            if self.columnar_writer is None:
+                self.columnar_writer = ColumnarReplayWriter(self.get_path())
+            self.columnar_writer.add_turn(turn)
+            return
+
+        if self.keyframe_interval is not None:
+            full_turn = turn
+            if self.num_turns % self.keyframe_interval != 0:
+                turn = encode_delta(self.previous_turn, full_turn, self.predictor)
+            self.previous_turn = full_turn
+
+        if self.streaming:
+            if self.stream is None:
+                self.open_stream()
+            if self.num_turns > 0:
+                self.stream.write(", ")
+            # json.dumps encodes in C; json.dump to a stream falls back to the pure Python encoder
+            self.stream.write(json.dumps(turn))
+        else:
+            self.turns.append(turn)
+        self.num_turns += 1
+
+    def get_turn(self, gs: GameState) -> dict:
         turn = ReplayTurn(
             turn_number=gs.turn,
             blue_balance=gs.balance[Team.BLUE],
@@ -137,7 +388,7 @@ class Replay:
                     turn.blue_debris.append(replay_deb.__dict__)
                 else:
                     turn.red_debris.append(replay_deb.__dict__)
-        self.turns.append(turn.__dict__)
+        return turn.__dict__
 
     def set_winner(self, winner: Team):
         if winner == Team.BLUE:
@@ -148,8 +399,34 @@ class Replay:
             self.metadata.scores = [0.0, 1.0]
 
     def write_json(self):
+        if self.writer is not None:
+            writer = self.writer
+            self.writer = None
+            writer.submit(self.finish)
+            writer.close()
+        else:
+            self.finish()
+
+    def finish(self):
+        if self.columnar:
+            if self.columnar_writer is None: # no turns were added
+                self.columnar_writer = ColumnarReplayWriter(self.get_path())
+            self.columnar_writer.close(self.metadata.__dict__)
+            self.columnar_writer = None
+            return
+
+        if self.streaming:
+            if self.stream is None: # no turns were added
+                self.open_stream()
+            self.stream.write('], "metadata": ')
+            json.dump(self.metadata.__dict__, self.stream)
+            self.stream.write("}")
+            self.stream.close()
+            self.stream = None
+            return
+
         res = {
             "metadata": self.metadata.__dict__,
             "turns": self.turns
         }
-        compress_json.dump(res, f"replays/{self.metadata.game_name}.awap24r.gz")
+        compress_json.dump(res, self.get_path())
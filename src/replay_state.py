@@ -0,0 +1,99 @@
+# Loads replays of every format and rebuilds a GameState from their turns, so the replay viewer
+# (replay_game.py) and the frame exporter (src/frame_export.py) show turns the same way
+
+import json
+import compress_json
+from src.columnar_replay import load_columnar_replay
+from src.debris import Debris
+from src.game_constants import Team, TowerType
+from src.game_state import GameState
+from src.tower import Tower
+
+def load_replay(path: str) -> dict:
+    '''
+    Loads a .awap24r.gz, .awap24r, .awap24rc or .awap24a.gz replay as {"metadata": ..., "turns": ...}
+    '''
+    if path.endswith('.awap24r.gz'):
+        return compress_json.load(path)
+    elif path.endswith('.awap24r'):
+        with open(path, 'r') as file:
+            return json.load(file)
+    elif path.endswith('.awap24rc'):
+        return load_columnar_replay(path)
+    elif path.endswith('.awap24a.gz'):
+        from src.action_replay import load_action_replay
+        return load_action_replay(path)
+    raise ValueError(f"Not a replay file: {path}")
+
+def get_tower(team: Team, json_tower: dict) -> Tower:
+    tower = Tower(team, TowerType[json_tower['type'].upper()], json_tower['x'], json_tower['y'], json_tower['id'])
+    tower.current_cooldown = json_tower['cooldown']
+    return tower
+
+def get_debris(team: Team, json_debris: dict) -> Debris:
+    debris = Debris(
+        team,
+        json_debris['x'],
+        json_debris['y'],
+        json_debris['max_cooldown'],
+        json_debris['max_health'],
+        json_debris['sent_by_opponent'],
+        json_debris['id']
+    )
+    debris.current_cooldown = json_debris['cooldown']
+    debris.health = json_debris['health']
+    return debris
+
+def update_towers(gs: GameState, team: Team, json_towers: list):
+    # Update the towers that are still there in place, and only create the new ones
+    towers = gs.towers[team]
+    ids = set()
+    for json_tower in json_towers:
+        ids.add(json_tower['id'])
+        tower = towers.get(json_tower['id'])
+        if tower is None:
+            tower = get_tower(team, json_tower)
+            towers[tower.id] = tower
+        else:
+            tower.current_cooldown = json_tower['cooldown']
+    for id in [id for id in towers if id not in ids]:
+        del towers[id]
+
+def update_debris(gs: GameState, team: Team, json_debris_list: list):
+    all_debris = gs.debris[team]
+    ids = set()
+    for json_debris in json_debris_list:
+        ids.add(json_debris['id'])
+        debris = all_debris.get(json_debris['id'])
+        if debris is None:
+            debris = get_debris(team, json_debris)
+            all_debris[debris.id] = debris
+        else:
+            debris.x = json_debris['x']
+            debris.y = json_debris['y']
+            debris.health = json_debris['health']
+            debris.current_cooldown = json_debris['cooldown']
+    for id in [id for id in all_debris if id not in ids]:
+        del all_debris[id]
+
+def set_turn(gs: GameState, turn: dict):
+    '''
+    Makes gs show the full replay turn turn, for drawing. Only what the renderer reads is kept up to date.
+    '''
+    gs.turn = turn['turn_number']
+    gs.balance[Team.BLUE] = turn['blue_balance']
+    gs.balance[Team.RED] = turn['red_balance']
+    gs.health[Team.BLUE] = turn['blue_health']
+    gs.health[Team.RED] = turn['red_health']
+    gs.time_remaining[Team.BLUE] = turn['blue_time_remaining']
+    gs.time_remaining[Team.RED] = turn['red_time_remaining']
+
+    update_towers(gs, Team.BLUE, turn['blue_towers'])
+    update_towers(gs, Team.RED, turn['red_towers'])
+    update_debris(gs, Team.BLUE, turn['blue_debris'])
+    update_debris(gs, Team.RED, turn['red_debris'])
+
+    gs.current_snipes[Team.BLUE] = turn['blue_snipes']
+    gs.current_snipes[Team.RED] = turn['red_snipes']
+    gs.current_bombs[Team.BLUE] = turn['blue_bombs']
+    gs.current_bombs[Team.RED] = turn['red_bombs']
@@ -0,0 +1,53 @@
+# Background thread that serializes replays (delta encoding, compression and disk writes) while the game keeps running
+
+from queue import Queue, Empty
+from threading import Thread, current_thread
+
+# How often an idle writer checks whether the thread that owns it is still running
+POLL_INTERVAL = 0.5
+
+class ReplayWriter:
+    '''
+    Runs the jobs it is given on its own thread, in order.
+    The queue is bounded, so a game that gets ahead of the writer waits for it instead of piling up turns in memory.
+    The thread is a daemon, so a game that never closes its writer doesn't keep the process alive; close()
+    waits for every job, so a finished replay is always completely written when the game returns.
+    '''
+    def __init__(self, maxsize: int = 256):
+        self.jobs = Queue(maxsize)
+        self.owner = current_thread()
+        self.error = None # first exception raised by a job; later jobs are skipped
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            try:
+                job = self.jobs.get(timeout=POLL_INTERVAL)
+            except Empty:
+                if not self.owner.is_alive():  # The game stopped without finishing its replay
+                    return
+                continue
+            if job is None:  # Replay is finished
+                return
+            # After a failure the rest of the queue is still drained, so the game never blocks on a full queue
+            if self.error is not None:
+                continue
+            func, args = job
+            try:
+                func(*args)
+            except Exception as e:
+                self.error = e
+
+    def submit(self, func, *args):
+        self.jobs.put((func, args))
+
+    def close(self):
+        '''
+        Waits until every job submitted so far has run and stops the writer.
+        Raises the first exception a job raised, if any.
+        '''
+        self.jobs.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
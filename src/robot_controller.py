@@ -1,17 +1,24 @@
-import copy
 from typing import List
 import math
 
-from src.debris import Debris
+from src.debris import DebrisView
 from src.game_exception import GameException
-from src.game_constants import SnipePriority, Team, TowerType, GameConstants
+from src.game_constants import ActionType, SnipePriority, Team, TowerType, GameConstants
 from src.game_state import GameState
-from src.tower import Tower
+from src.action_log import ActionLog
+from src.map import Map
+from src.map_analysis import MapAnalysis, get_map_analysis
+from src.tower import TowerView
 
 class RobotController:
-    def __init__(self, team: Team, game_state: GameState):
+    def __init__(self, team: Team, game_state: GameState, action_log: ActionLog = None):
         self.__team = team
         self.__gs = game_state
+        self.__action_log = action_log
+
+    def __log_action(self, *action):
+        if self.__action_log is not None:
+            self.__action_log.add_action(self.__gs.turn, self.__team, list(action))
     
     def get_ally_team(self) -> Team:
         return self.__team
@@ -22,38 +29,36 @@ class RobotController:
         else:
             return Team.BLUE
     
-    def get_map(self) -> list:
-        return copy.deepcopy(self.__gs.map)
+    def get_map(self) -> Map:
+        return self.__gs.map
+
+    def get_map_analysis(self) -> MapAnalysis:
+        return get_map_analysis(self.__gs.map)
     
-    def get_towers(self, team: Team) -> List[Tower]:
-        return copy.deepcopy(list(self.__gs.towers[team].values()))
+    def get_towers(self, team: Team) -> List[TowerView]:
+        return [tower.get_view() for tower in self.__gs.towers[team].values()]
     
-    def get_debris(self, team: Team) -> List[Debris]:
-        return copy.deepcopy(list(self.__gs.debris[team].values()))
-
-    def sense_debris_within_radius_squared(self, team: Team, x: int, y: int, r2: int) -> List[Debris]:
-        inRange: List[Debris] = []
-        for deb in self.__gs.debris[team].values():
-            if (deb.x - x)**2 + (deb.y - y)**2 <= r2:
-                inRange.append(copy.deepcopy(deb))
+    def get_debris(self, team: Team) -> List[DebrisView]:
+        return [deb.get_view() for deb in self.__gs.debris[team].values()]
 
-        return inRange
+    def sense_debris_within_radius_squared(self, team: Team, x: int, y: int, r2: int) -> List[DebrisView]:
+        return [deb.get_view() for deb in self.__gs.get_debris_within_radius_squared(team, x, y, r2)]
 
-    def sense_debris_in_range_of_tower(self, team: Team, tower_id: int) -> List[Debris]:
+    def sense_debris_in_range_of_tower(self, team: Team, tower_id: int) -> List[DebrisView]:
         if tower_id not in self.__gs.towers[team]:
             raise GameException(f"Tried to sense debris in range of non-existent tower: {tower_id}")
         tower = self.__gs.towers[team][tower_id]
-        return self.sense_debris_within_radius_squared(team, tower.x, tower.y, tower.type.range)
+        return [deb.get_view() for deb in self.__gs.get_debris_in_range_of_tower(team, tower.type, tower.x, tower.y)]
 
-    def sense_towers_within_radius_squared(self, team: Team, x: int, y: int, r2: int) -> List[Tower]:
-        inRange: List[Tower] = []
+    def sense_towers_within_radius_squared(self, team: Team, x: int, y: int, r2: int) -> List[TowerView]:
+        inRange: List[TowerView] = []
         for tower in self.__gs.towers[team].values():
             if (tower.x - x)**2 + (tower.y - y)**2 <= r2:
-                inRange.append(copy.deepcopy(tower))
+                inRange.append(tower.get_view())
 
         return inRange
 
-    def sense_towers_in_range_of_tower(self, team: Team, tower_id: int) -> List[Tower]:
+    def sense_towers_in_range_of_tower(self, team: Team, tower_id: int) -> List[TowerView]:
         if tower_id not in self.__gs.towers[team]:
             raise GameException(f"Tried to sense towers in range of non-existent tower: {tower_id}")
         tower = self.__gs.towers[team][tower_id]
@@ -101,6 +106,7 @@ class RobotController:
             raise GameException("send_debris() called but can_send_debris() returned False")
         self.__gs.balance[self.__team] -= self.get_debris_cost(cooldown, health)
         self.__gs.sent_debris[self.__team] = (cooldown, health)
+        self.__log_action(ActionType.SEND_DEBRIS.name, cooldown, health)
     
     def is_placeable(self, team: Team, x: int, y: int) -> bool:
         if type(x) != int or type(y) != int:
@@ -108,6 +114,8 @@ class RobotController:
         return self.__gs.is_placeable(team, x, y)
     
     def can_build_tower(self, tower_type: TowerType, x: int, y: int) -> bool:
+        if not isinstance(tower_type, TowerType):
+            raise GameException("tower_type must be a TowerType")
         if self.__gs.balance[self.__team] < tower_type.cost:
             return False
         if type(x) != int or type(y) != int:
@@ -117,9 +125,12 @@ class RobotController:
     def build_tower(self, tower_type: TowerType, x: int, y: int):
         if not self.can_build_tower(tower_type, x, y):
             raise GameException("build_tower() called but can_build_tower() returned False")
-        tower = Tower(self.__team, tower_type, x, y)
-        self.__gs.towers[self.__team][tower.id] = tower
+        self.__add_tower(tower_type, x, y)
+
+    def __add_tower(self, tower_type: TowerType, x: int, y: int):
+        self.__gs.add_tower(self.__team, tower_type, x, y)
         self.__gs.balance[self.__team] -= tower_type.cost
+        self.__log_action(ActionType.BUILD_TOWER.name, tower_type.name, x, y)
 
     def sell_tower(self, tower_id: int):
         my_towers = self.__gs.towers[self.__team]
@@ -127,7 +138,8 @@ class RobotController:
             raise GameException("Cannot sell tower that doesn't exist")
         cost = my_towers[tower_id].type.cost
         self.__gs.balance[self.__team] += cost * GameConstants.REFUND_RATIO
-        del self.__gs.towers[self.__team][tower_id]
+        self.__gs.remove_tower(self.__team, tower_id)
+        self.__log_action(ActionType.SELL_TOWER.name, tower_id)
     
     def get_time_remaining_at_start_of_turn(self, team: Team) -> float:
         return self.__gs.time_remaining[team]
@@ -167,11 +179,14 @@ class RobotController:
 
         tower = self.__gs.towers[self.__team][tower_id]
         debris = self.__gs.debris[self.__team][debris_id]
+        self.__fire_snipe(tower, debris)
 
+    def __fire_snipe(self, tower, debris):
         tower.current_cooldown = TowerType.GUNSHIP.cooldown
 
         self.__gs.current_snipes[self.__team].append(((tower.x, tower.y), (debris.x, debris.y)))
-        self.__gs.damage_debris(debris_id, TowerType.GUNSHIP.damage)
+        self.__log_action(ActionType.SNIPE.name, tower.id, debris.id)
+        self.__gs.damage_debris(debris.id, TowerType.GUNSHIP.damage)
     
     def auto_snipe(self, tower_id: int, priority: SnipePriority):
         if tower_id not in self.__gs.towers[self.__team]:
@@ -179,15 +194,16 @@ class RobotController:
         tower = self.__gs.towers[self.__team][tower_id]
         if tower.type != TowerType.GUNSHIP:
             raise GameException("Auto sniping only works on Gunships")
+        return self.__auto_snipe(tower, priority)
 
+    def __auto_snipe(self, tower, priority: SnipePriority) -> bool:
         # Get list of snipeable debris
-        debris = []
-        for deb in self.__gs.debris[self.__team].values():
-            if self.can_snipe(tower_id, deb.id):
-                debris.append(deb)
-        
+        if tower.current_cooldown > 0:
+            return False
+        debris = self.__gs.get_debris_in_range_of_tower(self.__team, TowerType.GUNSHIP, tower.x, tower.y)
+
         if len(debris) == 0:
-            return
+            return False
         
         if priority == SnipePriority.FIRST:
             get_priority = lambda debris: debris.progress
@@ -202,7 +218,8 @@ class RobotController:
         else:
             raise GameException("Invalid priority passed to auto_snipe")
         highest_priority = max(debris, key=get_priority)
-        self.snipe(tower_id, highest_priority.id)
+        self.__fire_snipe(tower, highest_priority)
+        return True
     
     def can_bomb(self, tower_id: int):
         my_towers = self.__gs.towers[self.__team]
@@ -222,17 +239,15 @@ class RobotController:
             raise GameException("Cannot bomb")
         
         tower = self.__gs.towers[self.__team][tower_id]
+        self.__fire_bomb(tower)
 
+    def __fire_bomb(self, tower):
         tower.current_cooldown = TowerType.BOMBER.cooldown
 
         self.__gs.current_bombs[self.__team].append((tower.x, tower.y))
-        ids_in_range = []
-        for deb in self.__gs.debris[self.__team].values():
-            distance = (tower.x - deb.x)**2 + (tower.y - deb.y)**2
-            if distance <= TowerType.BOMBER.range:
-                ids_in_range.append(deb.id)
-        for deb_id in ids_in_range:
-            self.__gs.damage_debris(deb_id, TowerType.BOMBER.damage)
+        self.__log_action(ActionType.BOMB.name, tower.id)
+        for deb in self.__gs.get_debris_in_range_of_tower(self.__team, TowerType.BOMBER, tower.x, tower.y):
+            self.__gs.damage_debris(deb.id, TowerType.BOMBER.damage)
     
     def auto_bomb(self, tower_id: int):
         if tower_id not in self.__gs.towers[self.__team]:
@@ -240,10 +255,83 @@ class RobotController:
         tower = self.__gs.towers[self.__team][tower_id]
 
         if not self.can_bomb(tower_id):
-            return
-        
-        nearby_debris = self.sense_debris_in_range_of_tower(self.__team, tower_id)
+            return False
+        return self.__auto_bomb(tower)
+
+    def __auto_bomb(self, tower) -> bool:
+        if tower.current_cooldown > 0:
+            return False
+
+        nearby_debris = self.__gs.get_debris_in_range_of_tower(self.__team, tower.type, tower.x, tower.y)
         if len(nearby_debris) == 0:
-            return
+            return False
         
-        self.bomb(tower_id)
+        self.__fire_bomb(tower)
+        return True
+
+    def auto_fire_all(self, priority: SnipePriority):
+        '''
+        Calls auto_snipe on every ally gunship with the given priority and auto_bomb on every ally bomber,
+        in the same order as get_towers returns them
+        '''
+        for tower in self.__gs.towers[self.__team].values():
+            if tower.type == TowerType.GUNSHIP:
+                self.__auto_snipe(tower, priority)
+            elif tower.type == TowerType.BOMBER:
+                self.__auto_bomb(tower)
+
+    def submit_actions(self, actions: list) -> List[bool]:
+        '''
+        Applies a list of actions in order, in one call.
+        Each action is a tuple of an ActionType followed by the arguments of the matching method, e.g.
+        (ActionType.BUILD_TOWER, TowerType.GUNSHIP, x, y) or (ActionType.AUTO_SNIPE, tower_id, SnipePriority.FIRST).
+        Returns whether each action was applied. Actions that can't be applied (not enough balance,
+        tower on cooldown, debris already destroyed, ...) are skipped instead of raising a GameException.
+        Invalid arguments (a tower_type that isn't a TowerType, sniping with a bomber, ...) still raise one.
+        '''
+        my_towers = self.__gs.towers[self.__team]
+        my_debris = self.__gs.debris[self.__team]
+
+        # Actions go through the same checks as the single calls. Towers and debris that no longer exist
+        # (sold or destroyed earlier in the batch) skip the action; misuse raises the same GameException.
+        results = []
+        for action in actions:
+            action_type = action[0]
+            applied = False
+            if action_type == ActionType.BUILD_TOWER:
+                _, tower_type, x, y = action
+                if self.can_build_tower(tower_type, x, y):
+                    self.__add_tower(tower_type, x, y)
+                    applied = True
+            elif action_type == ActionType.SELL_TOWER:
+                _, tower_id = action
+                if tower_id in my_towers:
+                    self.sell_tower(tower_id)
+                    applied = True
+            elif action_type == ActionType.SNIPE:
+                _, tower_id, debris_id = action
+                if tower_id in my_towers and debris_id in my_debris and self.can_snipe(tower_id, debris_id):
+                    self.__fire_snipe(my_towers[tower_id], my_debris[debris_id])
+                    applied = True
+            elif action_type == ActionType.BOMB:
+                _, tower_id = action
+                if tower_id in my_towers and self.can_bomb(tower_id):
+                    self.__fire_bomb(my_towers[tower_id])
+                    applied = True
+            elif action_type == ActionType.AUTO_SNIPE:
+                _, tower_id, priority = action
+                if tower_id in my_towers:
+                    applied = self.auto_snipe(tower_id, priority)
+            elif action_type == ActionType.AUTO_BOMB:
+                _, tower_id = action
+                if tower_id in my_towers:
+                    applied = self.auto_bomb(tower_id)
+            elif action_type == ActionType.SEND_DEBRIS:
+                _, cooldown, health = action
+                if self.can_send_debris(cooldown, health):
+                    self.send_debris(cooldown, health)
+                    applied = True
+            else:
+                raise GameException(f"submit_actions(): Unknown action type {action_type}")
+            results.append(applied)
+        return results
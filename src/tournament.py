@@ -0,0 +1,73 @@
+# Runs every bot against every other bot on a set of maps, spreading the
+# matches over a pool of worker processes
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.game import Game
+from src.game_constants import Team
+from src.map_cache import map_cache
+
+def get_matches(bot_paths: list, map_paths: list) -> list:
+    '''
+    Returns every (blue_path, red_path, map_path) match of the tournament.
+    Each pair of bots plays twice per map, once on each side.
+    '''
+    matches = []
+    for map_path in map_paths:
+        for blue_path, red_path in itertools.permutations(bot_paths, 2):
+            matches.append((blue_path, red_path, map_path))
+    return matches
+
+def play_match(blue_path: str, red_path: str, map_path: str, summary_only: bool = False, background_replay: bool = False):
+    game = Game(
+        blue_path=blue_path,
+        red_path=red_path,
+        map_path=map_path,
+        summary_only=summary_only,
+        background_replay=background_replay
+    )
+    winner = game.run_game()
+    return winner, os.getpid(), map_cache.cache_info()
+
+def run_tournament(bot_paths: list, map_paths: list, workers: int = None, summary_only: bool = False, background_replay: bool = False) -> dict:
+    '''
+    Plays the tournament, printing each result as soon as its match finishes.
+    Returns a dict mapping each bot path to its (wins, games) totals.
+    With summary_only, matches write a result summary instead of a replay. With background_replay, each match's
+    replay is encoded and written on a background thread while the match plays.
+    '''
+    if workers is None:
+        workers = os.cpu_count()
+    matches = get_matches(bot_paths, map_paths)
+    results = {bot_path: [0, 0] for bot_path in bot_paths}
+    cache_infos = {} # worker pid -> latest map cache info of that worker
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(play_match, *match, summary_only, background_replay): match for match in matches}
+        for i, future in enumerate(as_completed(futures)):
+            blue_path, red_path, map_path = futures[future]
+            try:
+                winner, pid, cache_info = future.result()
+            except Exception as e:
+                print(f"[{i+1}/{len(matches)}] {blue_path} vs {red_path} on {map_path}: failed ({e})", flush=True)
+                continue
+
+            cache_infos[pid] = cache_info
+            winner_path = blue_path if winner == Team.BLUE else red_path
+            results[blue_path][1] += 1
+            results[red_path][1] += 1
+            results[winner_path][0] += 1
+            print(f"[{i+1}/{len(matches)}] {blue_path} vs {red_path} on {map_path}: {winner_path} wins", flush=True)
+
+    for pid, cache_info in sorted(cache_infos.items()):
+        print(f"Worker {pid} map cache: {cache_info.hits} hits, {cache_info.misses} misses")
+
+    return {bot_path: tuple(totals) for bot_path, totals in results.items()}
+
+def print_standings(results: dict):
+    print("Standings:")
+    standings = sorted(results.items(), key=lambda item: item[1][0] / max(item[1][1], 1), reverse=True)
+    for bot_path, (wins, games) in standings:
+        win_rate = wins / games if games > 0 else 0.0
+        print(f"  {bot_path}: {wins}/{games} ({win_rate:.1%})")
@@ -1,19 +1,25 @@
+from typing import NamedTuple
 from src.game_constants import Team, TowerType
 
-class Tower:
-    id_counter = 0
+class TowerView(NamedTuple):
+    '''
+    Read-only snapshot of a Tower, handed to players instead of a copy
+    '''
+    id: int
+    team: Team
+    type: TowerType
+    x: int
+    y: int
+    current_cooldown: float
 
-    def __init__(self, team: Team, type: TowerType, x: int, y: int):
-        self.id = self.increment()
+class Tower:
+    def __init__(self, team: Team, type: TowerType, x: int, y: int, id: int):
+        self.id = id
         self.team = team
         self.type = type
         self.x = x
         self.y = y
         self.current_cooldown = 1.0
-    
-    @staticmethod
-    def increment() -> int:
-        res = Tower.id_counter
-        Tower.id_counter += 1
-        return res
-    
\ No newline at end of file
+
+    def get_view(self) -> TowerView:
+        return TowerView(self.id, self.team, self.type, self.x, self.y, self.current_cooldown)